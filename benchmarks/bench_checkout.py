@@ -0,0 +1,57 @@
+import random
+
+from src.catalog import Catalog
+from src.checkout import Checkout
+from src.scanlog import replay
+from benchmarks.fixtures import distinct_items, get_distinct_rules, get_rules
+
+SIZES = [10, 1000, 100000]
+
+
+def _items(size: int):
+    rng = random.Random(size)
+    return [rng.choice("ABCDE") for _ in range(size)]
+
+
+def benchmarks():
+    """Yield scan and total throughput benchmarks for baskets of several sizes, drawn
+    from five SKUs and drawn without repetition from a large catalog."""
+    catalog = Catalog(get_rules())
+    for size in SIZES:
+        items = _items(size)
+
+        def scan(items=items):
+            checkout = Checkout(catalog)
+            for item in items:
+                checkout.scan(item)
+            return checkout
+
+        def scan_total(items=items):
+            checkout = Checkout(catalog)
+            for item in items:
+                checkout.scan(item)
+                checkout.calculate_total_price()
+
+        scanned = scan()
+        yield f"checkout.scan[{size}]", scan, size
+        yield f"checkout.scan_and_total[{size}]", scan_total, size
+        yield f"checkout.total[{size}]", lambda items=items: scan(items).calculate_total_price(), size
+        yield f"checkout.total_cached[{size}]", scanned.calculate_total_price, 1
+
+    distinct = Catalog(get_distinct_rules())
+    for size in SIZES:
+        items = distinct_items(size)
+
+        def scan_distinct(items=items):
+            checkout = Checkout(distinct)
+            for item in items:
+                checkout.scan(item)
+            return checkout
+
+        yield f"checkout.scan_distinct[{size}]", scan_distinct, size
+        yield f"checkout.total_distinct[{size}]", lambda items=items: scan_distinct(items).calculate_total_price(), size
+        yield f"checkout.receipt_distinct[{size}]", lambda items=items: scan_distinct(items).receipt(), size
+
+    log = "AA|F2.5|BCDE" * 10000
+    chunks = [log[i:i + 4096] for i in range(0, len(log), 4096)]
+    yield "scanlog.replay[70k]", lambda: replay(Checkout(catalog), chunks), 70000
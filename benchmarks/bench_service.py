@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.catalog import Catalog
+from src.service import CheckoutService
+from benchmarks.fixtures import get_rules
+
+LANES = [1, 2, 4, 8]
+SCANS_PER_LANE = 2000
+
+
+def benchmarks():
+    """Yield multi-lane stress benchmarks with striped locks and with a single global lock."""
+    catalog = Catalog(get_rules())
+    for stripes in [64, 1]:
+        for lanes in LANES:
+            def stress(lanes=lanes, stripes=stripes):
+                service = CheckoutService(catalog, stripes=stripes)
+                for lane in range(lanes):
+                    service.open(lane)
+
+                def run_lane(lane):
+                    for _ in range(SCANS_PER_LANE // 10):
+                        for item in "ABCDEABCDE":
+                            service.scan(lane, item)
+                        service.total(lane)
+
+                with ThreadPoolExecutor(max_workers=lanes) as executor:
+                    list(executor.map(run_lane, range(lanes)))
+
+            yield f"service.stripes[{stripes}].lanes[{lanes}]", stress, lanes * SCANS_PER_LANE
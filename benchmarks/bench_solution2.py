@@ -0,0 +1,58 @@
+import random
+
+from solution2.checkout import Checkout
+from benchmarks.fixtures import get_bundle_rules
+
+BASKET_SIZES = [10, 20, 40]
+RULE_COUNTS = [8, 32, 128]
+HARD_SKUS = "ABCDEFGH"
+
+
+def _rules(count: int):
+    """Build a catalog of bundle rules over six SKUs with the given number of rules."""
+    rng = random.Random(count)
+    rules = {sku: 1 + i for i, sku in enumerate("ABCDEF")}
+    while len(rules) < count:
+        bundle = "".join(sorted(rng.choice("ABCDEF") for _ in range(rng.randint(2, 4))))
+        rules[bundle] = round(len(bundle) * rng.uniform(0.6, 1.0), 2)
+    return rules
+
+
+def _hard_rules():
+    """Build a catalog of overlapping bundles over eight SKUs that needs a real search."""
+    rng = random.Random(5)
+    rules = {sku: 1 + i for i, sku in enumerate(HARD_SKUS)}
+    for _ in range(30):
+        bundle = "".join(sorted(rng.sample(HARD_SKUS, rng.randint(2, 4))))
+        rules[bundle] = round(len(bundle) * rng.uniform(0.5, 1.2), 2)
+    return rules
+
+
+def benchmarks():
+    """Yield solution2 optimizer benchmarks scaling with basket size and rule count."""
+    for size in BASKET_SIZES:
+        items = list("ABCD" * size)[:size]
+        for optimizer in ["dp", "bnb"]:
+            def solve(items=items, optimizer=optimizer):
+                return Checkout(get_bundle_rules(), optimizer).calculate_price(items)
+            yield f"solution2.{optimizer}.basket[{size}]", solve, 1
+
+    rng = random.Random(0)
+    items = [rng.choice("ABCDEF") for _ in range(12)]
+    for count in RULE_COUNTS:
+        rules = _rules(count)
+        for optimizer in ["dp", "bnb"]:
+            def solve(rules=rules, optimizer=optimizer):
+                return Checkout(rules, optimizer).calculate_price(items)
+            yield f"solution2.{optimizer}.rules[{count}]", solve, 1
+
+    # Serial vs parallel branch-and-bound on the same basket; the ratio of the
+    # two timings is the wall-clock speedup of the process pool, including its start-up.
+    rng = random.Random(5)
+    items = [rng.choice(HARD_SKUS) for _ in range(26)]
+    rules = _hard_rules()
+    for optimizer in ["bnb", "parallel"]:
+        def solve(optimizer=optimizer):
+            with Checkout(rules, optimizer) as checkout:
+                return checkout.calculate_price(items)
+        yield f"solution2.{optimizer}.hard", solve, 1
@@ -0,0 +1,30 @@
+from src.strategy import (RegularPricing,
+                          DiscountPricing,
+                          NDiscountMPricing,
+                          BuyNGetMFreePricing,
+                          NForMPricing,
+                          WeightPricing,
+                          TieredPricing)
+
+STRATEGIES = [
+    RegularPricing(1.1),
+    DiscountPricing(2, 10),
+    NDiscountMPricing(4, 3, 10),
+    BuyNGetMFreePricing(3, 3, 2),
+    NForMPricing(1, 3, 2),
+    WeightPricing(10, 1),
+    TieredPricing(2, [(tier * 10, 2 - tier * 0.1) for tier in range(1, 16)], "graduated"),
+]
+
+QUANTITIES = list(range(1, 1001))
+
+
+def benchmarks():
+    """Yield per-call and batch benchmarks for every pricing strategy."""
+    for strategy in STRATEGIES:
+        name = type(strategy).__name__
+        yield f"strategy.{name}.calculate_price", lambda strategy=strategy: strategy.calculate_price(7), 1
+        yield (f"strategy.{name}.calculate_price_cents",
+               lambda strategy=strategy: strategy.calculate_price_cents(7), 1)
+        yield (f"strategy.{name}.calculate_prices[1k]",
+               lambda strategy=strategy: strategy.calculate_prices(QUANTITIES), len(QUANTITIES))
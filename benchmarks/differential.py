@@ -0,0 +1,578 @@
+"""Differential testing of the pricing engines against reference implementations.
+
+Random catalogs and baskets are priced by the scalar strategies of src, by an
+exhaustive search over the allocations of cross-SKU promotions and by an
+exhaustive itertools search over solution2 bundle rules, then by every optimized,
+batched, scheduled, versioned or snapshot path. Mismatches are shrunk to a
+minimal case, and the throughput of each path is reported relative to its
+reference.
+
+Usage:
+    python -m benchmarks.differential --cases 200 --seed 0
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from functools import lru_cache
+from itertools import product
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from solution2.checkout import Checkout as BundleCheckout
+from src.batch import BatchCheckout
+from src.catalog import Catalog, VersionedCatalog
+from src.checkout import Checkout
+from src.loader import STRATEGY_NAMES, load_snapshot, save_snapshot
+from src.promotion import BundlePromotion, MixAndMatchPromotion, PromotionEngine
+from src.rule import Rule, ScheduledRule
+from src.service import CheckoutService
+from src.strategy import (RegularPricing,
+                          DiscountPricing,
+                          NDiscountMPricing,
+                          BuyNGetMFreePricing,
+                          NForMPricing,
+                          WeightPricing,
+                          TieredPricing)
+
+STRATEGIES = {
+    "RegularPricing": RegularPricing,
+    "DiscountPricing": DiscountPricing,
+    "NDiscountMPricing": NDiscountMPricing,
+    "BuyNGetMFreePricing": BuyNGetMFreePricing,
+    "NForMPricing": NForMPricing,
+    "WeightPricing": WeightPricing,
+    "TieredPricing": TieredPricing,
+}
+
+Spec = Tuple[str, tuple]
+Case = Tuple[Dict[str, Spec], List[Tuple[str, float]]]
+
+
+def _random_strategy(rng: random.Random) -> Spec:
+    """Draw the class name and arguments of a random unit strategy."""
+    price = rng.randint(1, 500) / 100
+    kind = rng.choice(["RegularPricing", "DiscountPricing", "NDiscountMPricing", "BuyNGetMFreePricing",
+                       "NForMPricing", "TieredPricing"])
+    if kind == "DiscountPricing":
+        return kind, (price, rng.randint(0, 100))
+    if kind == "NDiscountMPricing":
+        return kind, (price, rng.randint(1, 5), rng.randint(0, 100))
+    if kind == "BuyNGetMFreePricing":
+        return kind, (price, rng.randint(1, 4), rng.randint(1, 3))
+    if kind == "NForMPricing":
+        return kind, (price, rng.randint(1, 5), rng.randint(1, 1000) / 100)
+    if kind == "TieredPricing":
+        thresholds = rng.sample(range(2, 20), rng.randint(1, 5))
+        tiers = tuple((threshold, rng.randint(1, 500) / 100) for threshold in thresholds)
+        return kind, (price, tiers, rng.choice(["all_units", "graduated"]))
+    return kind, (price,)
+
+
+def random_case(rng: random.Random, skus: int = 6, scans: int = 12) -> Case:
+    """Draw a random src catalog and basket.
+
+    Args:
+        rng (random.Random): The random number generator
+        skus (int, optional): The number of SKUs in the catalog. Defaults to 6.
+        scans (int, optional): The maximum number of scans in the basket. Defaults to 12.
+
+    Returns:
+        Tuple[Dict[str, Spec], List[Tuple[str, float]]]: The strategy spec of every SKU
+        and the scans of the basket
+    """
+    catalog = {}
+    for index in range(skus):
+        roll = rng.random()
+        if roll < 0.15:
+            catalog[f"S{index}"] = ("WeightPricing", (rng.randint(1, 500) / 100, rng.choice([0.5, 1, 2.5])))
+        elif roll < 0.3:
+            policy = rng.choice(["best_of", "stack"])
+            catalog[f"S{index}"] = ("Combined", (policy, (_random_strategy(rng), _random_strategy(rng))))
+        else:
+            catalog[f"S{index}"] = _random_strategy(rng)
+    basket = []
+    for _ in range(rng.randint(0, scans)):
+        sku = rng.choice(list(catalog))
+        if catalog[sku][0] == "WeightPricing":
+            basket.append((sku, rng.randint(1, 500) / 100))
+        else:
+            basket.append((sku, rng.randint(1, 3)))
+    return catalog, basket
+
+
+def build_rule(spec: Spec, cache_size: int = 0) -> Rule:
+    """Build a pricing rule from its spec.
+
+    Args:
+        spec (Tuple[str, tuple]): The class name and arguments of the strategy
+        cache_size (int, optional): The price cache size of the rule. Defaults to 0.
+
+    Returns:
+        Rule: The rule
+    """
+    kind, arguments = spec
+    if kind == "Combined":
+        policy, specs = arguments
+        return Rule([build_rule(inner).strategy for inner in specs], cache_size, policy)
+    return Rule(STRATEGIES[kind](*arguments), cache_size)
+
+
+def _quantities(basket: List[Tuple[str, float]]) -> Dict[str, float]:
+    quantities: Dict[str, float] = {}
+    for sku, quantity in basket:
+        quantities[sku] = quantities.get(sku, 0) + quantity
+    return quantities
+
+
+def reference_total(rules: Dict[str, Rule], basket: List[Tuple[str, float]]) -> float:
+    """Price a basket with the scalar strategies, one SKU at a time."""
+    return round(sum(rules[sku].strategy.calculate_price(quantity)
+                     for sku, quantity in _quantities(basket).items()), 2)
+
+
+def reference_cents(rules: Dict[str, Rule], basket: List[Tuple[str, float]]) -> int:
+    """Price a basket in cents with the scalar strategies, one SKU at a time."""
+    return sum(rules[sku].strategy.calculate_price_cents(quantity)
+               for sku, quantity in _quantities(basket).items())
+
+
+def _checkout(rules, basket):
+    checkout = Checkout(rules)
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+    return checkout.calculate_total_price()
+
+
+def _checkout_running(rules, basket):
+    checkout = Checkout(rules)
+    total = 0
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+        total = checkout.calculate_total_price()
+    return total
+
+
+def _checkout_cents(rules, basket):
+    checkout = Checkout(rules, "cents")
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+    return checkout.calculate_total_cents()
+
+
+def _batch(rules, basket):
+    totals = BatchCheckout(rules).calculate_total_prices([0] * len(basket), [sku for sku, _ in basket],
+                                                         [quantity for _, quantity in basket])
+    return totals.get(0, 0)
+
+
+def _service(rules, basket):
+    service = CheckoutService(rules, stripes=4)
+    service.open(0)
+    for sku, quantity in basket:
+        service.scan(0, sku, quantity)
+    return service.total(0)
+
+
+def _cached(rules, basket):
+    rules = {sku: Rule(rule.strategy, cache_size=4) for sku, rule in rules.items()}
+    _checkout(rules, basket)
+    return _checkout(rules, basket)
+
+
+def _receipt(rules, basket, money_mode="float"):
+    checkout = Checkout(rules, money_mode)
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+    receipt = checkout.receipt()
+    lines = sum(line.price for line in receipt.lines)
+    return receipt.total, lines if money_mode == "cents" else round(lines, 2)
+
+
+def _receipt_cents(rules, basket):
+    return _receipt(rules, basket, "cents")
+
+
+def _scheduled(rules, basket):
+    """Scan half the basket before the rules' windows open and the rest inside them."""
+    now = [15]
+    rules = {sku: ScheduledRule(RegularPricing(9.99), [(0, 10, rule.strategy)], lambda: now[0], cache_size=4)
+             for sku, rule in rules.items()}
+    checkout = Checkout(rules)
+    half = len(basket) // 2
+    for sku, quantity in basket[:half]:
+        checkout.scan(sku, quantity)
+    checkout.calculate_total_price()
+    now[0] = 5
+    for sku, quantity in basket[half:]:
+        checkout.scan(sku, quantity)
+    return checkout.calculate_total_price()
+
+
+def _versioned(rules, basket):
+    """Scan between publishes that replace placeholder rules one batch at a time."""
+    catalog = VersionedCatalog({sku: Rule(RegularPricing(9.99)) for sku in rules})
+    checkout = Checkout(catalog, follow_latest=True)
+    skus = list(rules)
+    half = len(basket) // 2
+    for sku, quantity in basket[:half]:
+        checkout.scan(sku, quantity)
+    checkout.calculate_total_price()
+    catalog.publish({sku: rules[sku] for sku in skus[:len(skus) // 2]})
+    for sku, quantity in basket[half:]:
+        checkout.scan(sku, quantity)
+    checkout.calculate_total_price()
+    for sku in skus[len(skus) // 2:]:
+        catalog.publish({sku: rules[sku]})
+    return checkout.calculate_total_price()
+
+
+def _snapshot(rules, basket):
+    """Price the SKUs a snapshot can hold from a mapped snapshot, and the rest directly."""
+    stored = {sku for sku, rule in rules.items() if type(rule.strategy) in STRATEGY_NAMES}
+    direct = Checkout({sku: rule for sku, rule in rules.items() if sku not in stored}, "cents")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snapshot")
+        save_snapshot(Catalog({sku: rules[sku] for sku in stored}), path)
+        with load_snapshot(path) as snapshot:
+            mapped = Checkout(snapshot, "cents")
+            for sku, quantity in basket:
+                (mapped if sku in stored else direct).scan(sku, quantity)
+            return mapped.calculate_total_cents() + direct.calculate_total_cents()
+
+
+SRC_PATHS: Dict[str, Tuple[Callable, Callable]] = {
+    "checkout": (_checkout, reference_total),
+    "checkout.running": (_checkout_running, reference_total),
+    "checkout.cents": (_checkout_cents, reference_cents),
+    "batch": (_batch, reference_total),
+    "service": (_service, reference_total),
+    "rule.cache": (_cached, reference_total),
+    "rule.scheduled": (_scheduled, reference_total),
+    "receipt": (_receipt, lambda rules, basket: (reference_total(rules, basket),) * 2),
+    "receipt.cents": (_receipt_cents, lambda rules, basket: (reference_cents(rules, basket),) * 2),
+    "catalog.versioned": (_versioned, reference_total),
+    "catalog.snapshot": (_snapshot, reference_cents),
+}
+
+
+PROMOTIONS = {
+    "BundlePromotion": BundlePromotion,
+    "MixAndMatchPromotion": MixAndMatchPromotion,
+}
+
+
+def random_promotion_case(rng: random.Random, skus: int = 5, promotions: int = 3, scans: int = 10) -> Case:
+    """Draw a random src catalog with cross-SKU promotions, and a basket.
+
+    The promotions are stored in the catalog next to the SKUs, so shrinking a case
+    drops promotions as well as rules.
+
+    Args:
+        rng (random.Random): The random number generator
+        skus (int, optional): The number of SKUs in the catalog. Defaults to 5.
+        promotions (int, optional): The maximum number of promotions. Defaults to 3.
+        scans (int, optional): The maximum number of scans in the basket. Defaults to 10.
+
+    Returns:
+        Tuple[Dict[str, Spec], List[Tuple[str, float]]]: The strategy or promotion spec
+        of every key and the scans of the basket
+    """
+    names = [f"S{index}" for index in range(skus)]
+    catalog = {sku: _random_strategy(rng) for sku in names}
+    for index in range(rng.randint(1, promotions)):
+        price = rng.randint(1, 1500) / 100
+        if rng.random() < 0.5:
+            members = rng.sample(names, rng.randint(1, min(3, skus)))
+            catalog[f"P{index}"] = ("BundlePromotion", ({sku: rng.randint(1, 3) for sku in members}, price))
+        else:
+            members = rng.sample(names, rng.randint(min(2, skus), min(4, skus)))
+            catalog[f"P{index}"] = ("MixAndMatchPromotion", (members, rng.randint(2, 4), price))
+    basket = [(rng.choice(names), rng.randint(1, 3)) for _ in range(rng.randint(0, scans))]
+    return catalog, basket
+
+
+def build_promotions(catalog: Dict[str, Spec]) -> Tuple[Dict[str, Rule], List]:
+    """Build the rules and promotions of a promotion case.
+
+    Promotions naming a SKU no longer in the catalog, e.g. after shrinking, are dropped.
+
+    Args:
+        catalog (Dict[str, Spec]): The strategy or promotion spec of every key
+
+    Returns:
+        Tuple[Dict[str, Rule], List[Promotion]]: The rules and the promotions
+    """
+    rules = {sku: build_rule(spec) for sku, spec in catalog.items() if spec[0] not in PROMOTIONS}
+    promotions = [PROMOTIONS[kind](*arguments) for kind, arguments in catalog.values()
+                  if kind in PROMOTIONS and set(arguments[0]) <= set(rules)]
+    return rules, promotions
+
+
+def exhaustive_promotions(built: Tuple[Dict[str, Rule], List], basket: List[Tuple[str, float]]) -> int:
+    """Price a basket in cents by trying every allocation of units to the promotions."""
+    rules, promotions = built
+    quantities = _quantities(basket)
+    skus = sorted({sku for promotion in promotions for sku in promotion.skus} & set(quantities))
+    plain = sum(rules[sku].strategy.calculate_price_cents(quantity)
+                for sku, quantity in quantities.items() if sku not in skus)
+    picks = []
+    for promotion in promotions:
+        positions = [skus.index(sku) if sku in skus else None for sku in promotion.skus]
+        if None in positions:
+            if isinstance(promotion, BundlePromotion):
+                continue
+            positions = [position for position in positions if position is not None]
+        if isinstance(promotion, BundlePromotion):
+            options = [dict(zip(positions, promotion.quantities))]
+        else:
+            options = [dict(zip(positions, counts)) for counts in product(range(promotion.quantity + 1),
+                                                                            repeat=len(positions))
+                       if sum(counts) == promotion.quantity]
+        picks.extend((promotion.price_cents, option) for option in options)
+
+    @lru_cache(maxsize=None)
+    def best(left: Tuple[int, ...]) -> int:
+        price = sum(rules[sku].strategy.calculate_price_cents(units) for sku, units in zip(skus, left) if units)
+        for cents, option in picks:
+            if all(left[position] >= units for position, units in option.items()):
+                rest = list(left)
+                for position, units in option.items():
+                    rest[position] -= units
+                price = min(price, cents + best(tuple(rest)))
+        return price
+
+    return plain + best(tuple(quantities[sku] for sku in skus))
+
+
+def _promotion_cents(built, basket):
+    rules, promotions = built
+    checkout = Checkout(rules, "cents", promotions)
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+    return checkout.calculate_total_cents()
+
+
+def _promotion_running(built, basket):
+    rules, promotions = built
+    checkout = Checkout(rules, "cents", promotions)
+    total = 0
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+        total = checkout.calculate_total_cents()
+    return total
+
+
+def _promotion_shared(built, basket):
+    rules, promotions = built
+    catalog = Catalog(rules)
+    checkout = Checkout(catalog, "cents", PromotionEngine(catalog, promotions))
+    for sku, quantity in basket:
+        checkout.scan(sku, quantity)
+    return checkout.receipt().total
+
+
+PROMOTION_PATHS: Dict[str, Tuple[Callable, Callable]] = {
+    "promotion.cents": (_promotion_cents, exhaustive_promotions),
+    "promotion.running": (_promotion_running, exhaustive_promotions),
+    "promotion.engine": (_promotion_shared, exhaustive_promotions),
+}
+
+
+def random_bundle_case(rng: random.Random, skus: str = "ABCD", rules: int = 6, items: int = 8,
+                       catalog: Optional[Dict[str, float]] = None):
+    """Draw random solution2 bundle rules and a basket small enough to search exhaustively.
+
+    Args:
+        rng (random.Random): The random number generator
+        skus (str, optional): The single-item SKUs. Defaults to "ABCD".
+        rules (int, optional): The number of bundle rules. Defaults to 6.
+        items (int, optional): The maximum number of items in the basket. Defaults to 8.
+        catalog (Optional[Dict[str, float]], optional): Rules to draw a basket for
+            instead of drawing new ones. Defaults to None.
+
+    Returns:
+        Tuple[Dict[str, float], List[str]]: The bundle rules and the items of the basket
+    """
+    if catalog is None:
+        catalog = {sku: rng.randint(1, 500) / 100 for sku in skus}
+        while len(catalog) < len(skus) + rules:
+            bundle = "".join(sorted(rng.choice(skus) for _ in range(rng.randint(2, 4))))
+            catalog[bundle] = rng.randint(1, 1500) / 100
+    return catalog, [rng.choice(skus) for _ in range(rng.randint(0, items))]
+
+
+def exhaustive_total(rules: Dict[str, float], items: List[str]) -> float:
+    """Price a basket by trying every combination of bundle counts with itertools."""
+    counts = Counter(items)
+    needs = [Counter(rule) for rule in rules]
+    ranges = [range(min(counts[sku] // need for sku, need in requirement.items()) + 1) for requirement in needs]
+    best = None
+    for applications in product(*ranges):
+        used = Counter()
+        for times, requirement in zip(applications, needs):
+            for sku, need in requirement.items():
+                used[sku] += times * need
+        if used == counts:
+            price = sum(times * price for times, price in zip(applications, rules.values()))
+            if best is None or price < best:
+                best = price
+    return round(best, 2)
+
+
+class _BundlePath:
+    """A solution2 path that keeps one checkout, and so one worker pool, while the rules stay the same."""
+
+    def __init__(self, optimizer: str):
+        self.optimizer = optimizer
+        self._rules: Optional[Dict[str, float]] = None
+        self._checkout: Optional[BundleCheckout] = None
+
+    def __call__(self, rules, items):
+        if rules != self._rules:
+            self.close()
+            self._rules, self._checkout = dict(rules), BundleCheckout(rules, self.optimizer)
+        return round(self._checkout.calculate_price(items), 2)
+
+    def close(self) -> None:
+        """Release the checkout and shut down the worker pool of its optimizer, if any.
+        """
+        if self._checkout is not None and hasattr(self._checkout.optimizer, "close"):
+            self._checkout.optimizer.close()
+        self._rules = self._checkout = None
+
+
+BUNDLE_PATHS: Dict[str, Tuple[Callable, Callable]] = {
+    "solution2.dp": (_BundlePath("dp"), exhaustive_total),
+    "solution2.bnb": (_BundlePath("bnb"), exhaustive_total),
+    "solution2.parallel": (_BundlePath("parallel"), exhaustive_total),
+}
+
+
+def _fails(path: Callable, reference: Callable, build: Callable, case) -> bool:
+    """Check whether a path disagrees with its reference on a case, errors included."""
+    try:
+        return path(build(case[0]), case[1]) != reference(build(case[0]), case[1])
+    except Exception:
+        return True
+
+
+def _smaller(case) -> Iterator:
+    """Yield cases one step smaller than a case: fewer scans, lower quantities, fewer rules."""
+    catalog, basket = case
+    for index in range(len(basket)):
+        yield catalog, basket[:index] + basket[index + 1:]
+    for index, scan in enumerate(basket):
+        if isinstance(scan, tuple) and scan[1] > 1 and float(scan[1]).is_integer():
+            yield catalog, basket[:index] + [(scan[0], scan[1] - 1)] + basket[index + 1:]
+    used = {scan[0] if isinstance(scan, tuple) else scan for scan in basket}
+    for key in catalog:
+        if key not in used:
+            yield {other: value for other, value in catalog.items() if other != key}, basket
+
+
+def shrink(case, fails: Callable) -> Tuple:
+    """Greedily shrink a failing case while it keeps failing.
+
+    Args:
+        case: The failing (catalog, basket) case
+        fails (Callable): Returns True when a case still fails
+
+    Returns:
+        tuple: The smallest failing case found
+    """
+    progress = True
+    while progress:
+        progress = False
+        for smaller in _smaller(case):
+            if fails(smaller):
+                case, progress = smaller, True
+                break
+    return case
+
+
+def run(cases: int = 100, seed: int = 0, paths: Optional[List[str]] = None) -> Dict[str, object]:
+    """Price random cases with every path and compare them with the references.
+
+    The promotion cases vary in size up to 6 SKUs, 4 promotions and 14 scans, so
+    the search budget of overlapping promotions is exercised as well. All the
+    bundle cases of a run share one set of rules, so every solution2 path
+    keeps a single checkout, and the parallel path a single worker pool, for the
+    whole run. A new checkout is only built for the smaller rules tried while
+    shrinking a mismatch.
+
+    Args:
+        cases (int, optional): The number of random cases per family. Defaults to 100.
+        seed (int, optional): The random seed. Defaults to 0.
+        paths (Optional[List[str]], optional): The paths to check. Defaults to all of them.
+
+    Returns:
+        Dict[str, object]: The shrunk mismatches and the throughput of every path
+        relative to its reference
+    """
+    rng = random.Random(seed)
+    bundle_rules = random_bundle_case(rng, rules=10)[0]
+    families = [(SRC_PATHS, [random_case(rng) for _ in range(cases)],
+                 lambda catalog: {sku: build_rule(spec) for sku, spec in catalog.items()}),
+                (PROMOTION_PATHS, [random_promotion_case(rng, rng.randint(2, 6), rng.randint(1, 4),
+                                                         rng.randint(1, 14)) for _ in range(cases)],
+                 build_promotions),
+                (BUNDLE_PATHS, [random_bundle_case(rng, catalog=bundle_rules) for _ in range(cases)],
+                 lambda catalog: catalog)]
+    mismatches = []
+    throughput = {}
+    for registry, family, build in families:
+        for name, (path, reference) in registry.items():
+            if paths is not None and name not in paths:
+                continue
+            timings = {"path": 0.0, "reference": 0.0}
+            for case in family:
+                results = {}
+                for role, function in (("path", path), ("reference", reference)):
+                    rules = build(case[0])
+                    start = perf_counter()
+                    try:
+                        results[role] = function(rules, case[1])
+                    except Exception as error:
+                        results[role] = repr(error)
+                    timings[role] += perf_counter() - start
+                if results["path"] != results["reference"]:
+                    fails = lambda case, path=path, reference=reference: _fails(path, reference, build, case)
+                    catalog, basket = shrink(case, fails)
+                    mismatches.append({"path": name, "catalog": catalog, "basket": basket,
+                                       "expected": reference(build(catalog), basket) if not isinstance(
+                                           results["reference"], str) else results["reference"],
+                                       "actual": path(build(catalog), basket) if not isinstance(
+                                           results["path"], str) else results["path"]})
+            if hasattr(path, "close"):
+                path.close()
+            throughput[name] = {"seconds": timings["path"],
+                                "reference_seconds": timings["reference"],
+                                "speedup": timings["reference"] / timings["path"] if timings["path"] else 0.0}
+    return {"cases": cases, "seed": seed, "mismatches": mismatches, "throughput": throughput}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Differential testing of the pricing engines.")
+    parser.add_argument("--cases", type=int, default=100, help="random cases per family")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--path", action="append", dest="paths", help="only check this path (repeatable)")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run(args.cases, args.seed, args.paths)
+    for name, timing in report["throughput"].items():
+        print(f"{name:<24}{timing['seconds'] * 1e3:>10.2f} ms {timing['speedup']:>8.2f}x vs reference")
+    for mismatch in report["mismatches"]:
+        print(f"MISMATCH {mismatch['path']}: {json.dumps(mismatch, default=str)}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, default=str)
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
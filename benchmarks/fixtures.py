@@ -0,0 +1,77 @@
+"""Catalogs and baskets shared by the benchmarks."""
+import random
+from typing import Dict, List
+from src.rule import Rule
+from src.strategy import (RegularPricing,
+                          DiscountPricing,
+                          NDiscountMPricing,
+                          BuyNGetMFreePricing,
+                          NForMPricing,
+                          WeightPricing)
+
+CATALOG_SIZE = 100000
+
+
+def get_rules() -> Dict[str, Rule]:
+    """Build the six-SKU catalog of the kata, one SKU per strategy.
+
+    Returns:
+        Dict[str, Rule]: The rules of SKUs A to F.
+    """
+    return {
+        "A": Rule(RegularPricing(1)),
+        "B": Rule(DiscountPricing(2, 10)),
+        "C": Rule(NDiscountMPricing(4, 3, 10)),
+        "D": Rule(BuyNGetMFreePricing(3, 3, 2)),
+        "E": Rule(NForMPricing(1, 3, 2)),
+        "F": Rule(WeightPricing(10, 1)),
+    }
+
+
+def get_bundle_rules() -> Dict[str, float]:
+    """Build the bundle prices of the second solution.
+
+    Returns:
+        Dict[str, float]: The price of every bundle of items.
+    """
+    return {
+        "A": 1,
+        "B": 2,
+        "C": 3,
+        "D": 4,
+        "AAA": 2,
+        "AAAAA": 3.4,
+        "CC": 5,
+        "CD": 5,
+    }
+
+
+def get_distinct_rules(count: int = CATALOG_SIZE) -> Dict[str, Rule]:
+    """Build a large catalog cycling through the unit-priced strategies.
+
+    Args:
+        count (int, optional): The number of SKUs. Defaults to CATALOG_SIZE.
+
+    Returns:
+        Dict[str, Rule]: The rules of SKUs S0 to S<count - 1>.
+    """
+    strategies = [lambda price: RegularPricing(price),
+                  lambda price: DiscountPricing(price, 10),
+                  lambda price: NDiscountMPricing(price, 3, 10),
+                  lambda price: BuyNGetMFreePricing(price, 3, 2),
+                  lambda price: NForMPricing(price, 3, 2 * price)]
+    return {f"S{index}": Rule(strategies[index % len(strategies)](1 + index % 97 / 4)) for index in range(count)}
+
+
+def distinct_items(size: int, count: int = CATALOG_SIZE) -> List[str]:
+    """Draw a basket of distinct SKUs from the catalog of get_distinct_rules.
+
+    Args:
+        size (int): The number of scans, at most count.
+        count (int, optional): The number of SKUs in the catalog. Defaults to CATALOG_SIZE.
+
+    Returns:
+        List[str]: The scanned SKUs, each one once.
+    """
+    rng = random.Random(size)
+    return [f"S{sku}" for sku in rng.sample(range(count), size)]
@@ -0,0 +1,106 @@
+"""Run the benchmark suite and optionally compare it against a stored baseline.
+
+Usage:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, Iterator, Tuple
+
+from benchmarks import bench_checkout, bench_service, bench_solution2, bench_strategy
+
+MODULES = [bench_strategy, bench_checkout, bench_service, bench_solution2]
+
+Benchmark = Tuple[str, Callable[[], object], int]
+
+
+def collect(pattern: str = "") -> Iterator[Benchmark]:
+    """Yield every benchmark whose name contains the pattern.
+
+    Yields:
+        Tuple[str, Callable, int]: The name, the function to time and the number of operations per call
+    """
+    for module in MODULES:
+        for name, function, operations in module.benchmarks():
+            if pattern in name:
+                yield name, function, operations
+
+
+def measure(function: Callable[[], object], operations: int, repeat: int = 5) -> Dict[str, float]:
+    """Time a benchmark function, keeping the best of several repeats.
+
+    Args:
+        function (Callable): The function to time
+        operations (int): The number of operations one call performs
+        repeat (int, optional): The number of timing repeats. Defaults to 5.
+
+    Returns:
+        Dict[str, float]: The seconds per call and the operations per second
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds": seconds, "ops_per_second": operations / seconds}
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> Dict[str, float]:
+    """Find the benchmarks that got slower than the baseline by more than the threshold.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): The current results
+        baseline (Dict[str, Dict[str, float]]): The stored baseline results
+        threshold (float): The allowed slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        Dict[str, float]: The slowdown ratio of every regressed benchmark
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare the results against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (default: 0.2)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark (default: 5)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, function, operations in collect(args.filter):
+        results[name] = measure(function, operations, args.repeat)
+        print(f"{name:<50} {results[name]['seconds'] * 1e6:>14.2f} us {results[name]['ops_per_second']:>14.0f} ops/s")
+
+    report = {
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in sorted(regressions.items()):
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,8 @@
+from time import perf_counter
 from typing import List, Dict, Optional
+from src import instrumentation
+from .index import RuleIndex
+from .optimizer import OPTIMIZERS, Optimizer
 
 class TreeNode:
     """Represents a node in the pricing calculation tree.
@@ -47,18 +51,37 @@ class Checkout:
 
     Attributes:
         rules (Dict[str, float]): Dictionary mapping rules to their prices
+        index (RuleIndex): The rules compiled for the optimizer
+        optimizer (Optimizer): The optimizer used to search for the best bundles
         best_node (Optional[TreeNode]): The node with the best price found
         best_price (float): The best price found so far
     """
-    def __init__(self, rules: Dict[str, float]):
+    def __init__(self, rules: Dict[str, float], optimizer: str = "dp", **options):
         """Initialize the checkout system.
 
         Args:
             rules (Dict[str, float]): Dictionary mapping rules to their prices
+            optimizer (str, optional): The optimizer backend, one of OPTIMIZERS. Defaults to "dp".
+            **options: Extra options for the optimizer, e.g. max_nodes or time_limit for "bnb"
         """
+        if optimizer not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer: {optimizer}")
         self.rules = rules
-        self.best_node = None
+        self.index = RuleIndex(rules)
+        self.optimizer: Optimizer = OPTIMIZERS[optimizer](self.index, **options)
+        self.items: List[str] = []
         self.best_price = float('inf')
+        self._best_node = None
+        self._best_items: List[str] = []
+        self._best_path: Optional[List[str]] = None
+        self._stale = True
+
+    @property
+    def best_node(self) -> Optional[TreeNode]:
+        """The node with the best price found, built lazily from the optimizer's path."""
+        if self._best_node is None and self._best_path is not None:
+            self._best_node = self._build_tree(TreeNode(None, None, self._best_items, self.rules))
+        return self._best_node
 
     def calculate_price(self, items: List[str]) -> TreeNode:
         """Calculate the best possible price for the given items.
@@ -69,12 +92,71 @@ class Checkout:
         Returns:
             TreeNode: The node containing the best price found
         """
-        self.best_node = None
-        self.best_price = float('inf')
-        root = TreeNode(None, None, items, self.rules)
-        self._build_tree(root)
+        self._solve(items)
+        self._stale = True
         return self.best_price
-    
+
+    def scan(self, item: str) -> None:
+        """Scan an item and add it to the current basket.
+
+        Args:
+            item (str): The item being scanned
+        """
+        self.items.append(item)
+        self._stale = True
+
+    def total(self) -> float:
+        """Calculate the best possible price for the scanned items.
+
+        The optimizer keeps its cached sub-solutions between calls, so each scan
+        only needs to solve the basket states it has not seen before.
+
+        Returns:
+            float: The best price of the scanned items
+        """
+        if self._stale:
+            self._solve(self.items)
+            self._stale = False
+        return self.best_price
+
+    def close(self) -> None:
+        """Shut down the worker processes of the optimizer, if it has any.
+        """
+        close = getattr(self.optimizer, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "Checkout":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _solve(self, items: List[str]) -> None:
+        """Run the optimizer and record the best price and path for the items.
+
+        Args:
+            items (List[str]): List of items to calculate price for
+        """
+        start = perf_counter() if instrumentation.enabled else None
+        price, path = self.optimizer.solve(items)
+        if start is not None:
+            name = f"solution2.{type(self.optimizer).__name__}"
+            instrumentation.record(f"{name}.solve", perf_counter() - start)
+            instrumentation.count(f"{name}.nodes", self.optimizer.nodes)
+            instrumentation.count(f"{name}.pruned", self.optimizer.pruned)
+        self._best_node = None
+        self._best_items = list(items)
+        if price == float('inf'):
+            self.best_price = price
+            self._best_path = None
+            return
+        self._best_path = path
+        price = 0
+        for rule in path:
+            price = price + self.rules[rule]
+        self.best_price = price
+
     def print_tree(self, node: TreeNode) -> None:
         """Print the tree structure showing the sequence of rules applied.
 
@@ -88,22 +170,18 @@ class Checkout:
             print(f"{node.rule}", end=" ")
         self.print_tree(node.parent)
 
-    def _build_tree(self, node: TreeNode) -> None:
-        """Recursively build the pricing tree by trying all possible rule combinations.
+    def _build_tree(self, node: TreeNode) -> TreeNode:
+        """Build the path of the best pricing found by the optimizer.
 
         Args:
-            node (TreeNode): The current node to build from
-        """
-        if not node.items:
-            if node.price < self.best_price:
-                self.best_price = node.price
-                self.best_node = node
-            return
+            node (TreeNode): The root node to build from
 
-        for rule in self.rules:
-            child = TreeNode(node, rule, node.items.copy(), self.rules)
-            if child.valid:
-                self._build_tree(child)
+        Returns:
+            TreeNode: The leaf node of the best path
+        """
+        for rule in self._best_path:
+            node = TreeNode(node, rule, node.items, self.rules)
+        return node
 
 def main():
     """Main function demonstrating the usage of the Checkout system.
@@ -122,21 +200,19 @@ def main():
     
     checkout = Checkout(rules)
     all_items = 'AAAAAAAAAA'
-    items = []
     for item in all_items:
-        items.append(item)
-        result = checkout.calculate_price(items)
-        print(f"Current items: {''.join(items)}, price: {result}")
+        checkout.scan(item)
+        result = checkout.total()
+        print(f"Current items: {''.join(checkout.items)}, price: {result}")
         checkout.print_tree(checkout.best_node)
 
 
     checkout = Checkout(rules)
     all_items = 'CDCCDCD'
-    items = []
     for item in all_items:
-        items.append(item)
-        result = checkout.calculate_price(items)
-        print(f"Current items: {''.join(items)}, price: {result}")
+        checkout.scan(item)
+        result = checkout.total()
+        print(f"Current items: {''.join(checkout.items)}, price: {result}")
         checkout.print_tree(checkout.best_node)
 
 if __name__ == "__main__":
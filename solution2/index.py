@@ -0,0 +1,101 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class RuleIndex:
+    """A compiled index of pricing rules over item-count vectors.
+
+    Every rule is compiled once into a sparse requirement vector, and every SKU keeps
+    an inverted list of the rules containing it. The search then only looks at the
+    rules of the SKU it branches on, and checking whether a rule fits costs
+    O(distinct SKUs in rule) instead of O(items in basket).
+
+    Attributes:
+        rules (Dict[str, float]): Dictionary mapping rules to their prices
+        skus (List[str]): Sorted list of all SKUs appearing in the rules
+        positions (Dict[str, int]): Dictionary mapping SKUs to their position in count vectors
+        names (List[str]): The rule of every rule id
+        prices (List[float]): The price of every rule id
+        sizes (List[int]): The number of items in every rule id
+        requirements (List[Counter]): The number of each SKU required by every rule id
+        inverted (List[List[int]]): The rule ids containing each SKU, indexed by position
+    """
+    def __init__(self, rules: Dict[str, float]):
+        """Compile the rules into the index.
+
+        Args:
+            rules (Dict[str, float]): Dictionary mapping rules to their prices
+        """
+        self.rules = rules
+        self.skus = sorted({sku for rule in rules for sku in rule})
+        self.positions = {sku: i for i, sku in enumerate(self.skus)}
+        self.names = list(rules)
+        self.prices = [rules[rule] for rule in self.names]
+        self.sizes = [len(rule) for rule in self.names]
+        self.requirements = [Counter(rule) for rule in self.names]
+        self._requirements = [tuple((self.positions[sku], need) for sku, need in requirement.items())
+                              for requirement in self.requirements]
+        self.inverted: List[List[int]] = [[] for _ in self.skus]
+        for rule_id, requirement in enumerate(self._requirements):
+            for position, _ in requirement:
+                self.inverted[position].append(rule_id)
+
+    def count(self, items) -> Optional[Tuple[int, ...]]:
+        """Convert a sequence of SKUs into a count vector.
+
+        Args:
+            items: The SKUs to count
+
+        Returns:
+            Optional[Tuple[int, ...]]: The number of each SKU indexed by position,
+            or None if an item is not covered by any rule
+        """
+        counts = [0] * len(self.skus)
+        for item in items:
+            position = self.positions.get(item)
+            if position is None:
+                return None
+            counts[position] += 1
+        return tuple(counts)
+
+    def applicable(self, rule_id: int, state: Tuple[int, ...]) -> bool:
+        """Check whether a rule fits in the remaining items.
+
+        Args:
+            rule_id (int): The rule to check
+            state (Tuple[int, ...]): The count vector of the remaining items
+
+        Returns:
+            bool: True if the remaining items contain every item of the rule
+        """
+        return all(state[position] >= need for position, need in self._requirements[rule_id])
+
+    def apply(self, rule_id: int, state: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Remove the items of a rule from the remaining items.
+
+        Args:
+            rule_id (int): The rule to apply
+            state (Tuple[int, ...]): The count vector of the remaining items
+
+        Returns:
+            Tuple[int, ...]: The count vector left after applying the rule
+        """
+        counts = list(state)
+        for position, need in self._requirements[rule_id]:
+            counts[position] -= need
+        return tuple(counts)
+
+    def candidates(self, state: Tuple[int, ...], order: Optional[List[List[int]]] = None) -> Iterator[int]:
+        """Yield the applicable rules containing the first remaining SKU of a state.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+            order (Optional[List[List[int]]], optional): Per-SKU rule ids to try
+                instead of the inverted lists. Defaults to None.
+
+        Yields:
+            int: The ids of the applicable rules
+        """
+        first = next(i for i, count in enumerate(state) if count)
+        for rule_id in (order or self.inverted)[first]:
+            if self.applicable(rule_id, state):
+                yield rule_id
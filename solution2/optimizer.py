@@ -0,0 +1,442 @@
+import time
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from .index import RuleIndex
+
+class Optimizer:
+    """Base class for all bundle optimizers.
+
+    The basket is represented as a vector of item counts (a multiset) instead of an
+    ordered list. Every state only branches on the rules covering its first remaining
+    SKU, so different orderings of the same bundles are never explored twice.
+
+    Attributes:
+        index (RuleIndex): The compiled rules to search over
+        optimal (bool): Whether the last solve explored the whole search space
+        nodes (int): The number of search nodes explored by the last solve
+        pruned (int): The number of search nodes pruned by the last solve
+    """
+    def __init__(self, index: RuleIndex):
+        """Initialize the optimizer.
+
+        Args:
+            index (RuleIndex): The compiled rules to search over
+        """
+        self.index = index
+        self.optimal = True
+        self.nodes = 0
+        self.pruned = 0
+
+    def solve(self, items: List[str]) -> Tuple[float, List[str]]:
+        """Find the best price and the rules to apply for the given items.
+
+        Args:
+            items (List[str]): List of items to calculate price for
+
+        Returns:
+            Tuple[float, List[str]]: The best price and the sequence of rules applied,
+            or (inf, []) if the items cannot be covered by the rules
+        """
+        raise NotImplementedError
+
+
+class DPOptimizer(Optimizer):
+    """An optimizer that memoizes the best price of every remaining multiset.
+
+    The memo only depends on the rules, so it is kept between solves: pricing a
+    basket that grew by one item reuses the sub-solutions of the previous one.
+    Once it holds more than max_memo states it is cleared before the next solve,
+    so a long-lived checkout keeps at most max_memo states plus those of a single
+    basket.
+
+    Attributes:
+        max_memo (int): The number of memoized states kept between solves
+    """
+    def __init__(self, index: RuleIndex, max_memo: int = 1000000):
+        """Initialize the dynamic-programming optimizer.
+
+        Args:
+            index (RuleIndex): The compiled rules to search over
+            max_memo (int, optional): The number of memoized states kept between solves.
+                Defaults to 1000000.
+        """
+        super().__init__(index)
+        self.max_memo = max_memo
+        self._memo: Dict[Tuple[int, ...], Tuple[float, Optional[int]]] = {}
+
+    def solve(self, items: List[str]) -> Tuple[float, List[str]]:
+        """Find the best price and the rules to apply for the given items.
+
+        Args:
+            items (List[str]): List of items to calculate price for
+
+        Returns:
+            Tuple[float, List[str]]: The best price and the sequence of rules applied,
+            or (inf, []) if the items cannot be covered by the rules
+        """
+        state = self.index.count(items)
+        if state is None:
+            return float('inf'), []
+        if len(self._memo) > self.max_memo:
+            self._memo.clear()
+        known = len(self._memo)
+        price = self._best(state)
+        self.nodes = len(self._memo) - known
+        path = []
+        while any(state):
+            _, choice = self._memo[state]
+            if choice is None:
+                return float('inf'), []
+            path.append(self.index.names[choice])
+            state = self.index.apply(choice, state)
+        return price, path
+
+    def _best(self, state: Tuple[int, ...]) -> float:
+        """Compute the best price for the remaining items.
+
+        The states are solved depth-first with an explicit stack, so long baskets
+        do not hit the recursion limit. A state is memoized once every candidate
+        rule has been priced.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+
+        Returns:
+            float: The best price for the remaining items
+        """
+        cached = self._memo.get(state)
+        if cached is not None:
+            return cached[0]
+        if not any(state):
+            return 0
+        index, memo = self.index, self._memo
+        # Every frame holds the state, its remaining candidates, the best price and
+        # rule found so far, and the rule leading to the child being solved.
+        stack = [[state, index.candidates(state), float('inf'), None, None]]
+        while stack:
+            frame = stack[-1]
+            for rule_id in frame[1]:
+                child = index.apply(rule_id, frame[0])
+                cached = memo.get(child)
+                if cached is None and any(child):
+                    frame[4] = rule_id
+                    stack.append([child, index.candidates(child), float('inf'), None, None])
+                    break
+                total = index.prices[rule_id] + (cached[0] if cached is not None else 0)
+                if total < frame[2]:
+                    frame[2], frame[3] = total, rule_id
+            else:
+                stack.pop()
+                memo[frame[0]] = (frame[2], frame[3])
+                if stack:
+                    parent = stack[-1]
+                    total = index.prices[parent[4]] + frame[2]
+                    if total < parent[2]:
+                        parent[2], parent[3] = total, parent[4]
+        return memo[state][0]
+
+    def clear(self) -> None:
+        """Drop all cached sub-solutions.
+        """
+        self._memo.clear()
+
+
+class BranchAndBoundOptimizer(Optimizer):
+    """An optimizer that searches bundles depth-first and prunes with a lower bound.
+
+    The lower bound prices every remaining item at the cheapest per-item price of
+    any rule containing it, which is the LP relaxation of the covering problem.
+    A greedy pass provides the first incumbent, and the search stops once its node
+    or time budget is spent, returning the best assignment found so far.
+
+    Attributes:
+        max_nodes (Optional[int]): The maximum number of nodes to explore per solve
+        time_limit (Optional[float]): The maximum number of seconds to search per solve
+    """
+    def __init__(self, index: RuleIndex, max_nodes: Optional[int] = None, time_limit: Optional[float] = None):
+        """Initialize the branch-and-bound optimizer.
+
+        Args:
+            index (RuleIndex): The compiled rules to search over
+            max_nodes (Optional[int], optional): Node budget per solve. Defaults to None (unbounded).
+            time_limit (Optional[float], optional): Time budget in seconds per solve. Defaults to None (unbounded).
+        """
+        super().__init__(index)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self._shared_bound = None
+        unit_price = [price / size for price, size in zip(index.prices, index.sizes)]
+        self._by_unit_price = [sorted(rule_ids, key=unit_price.__getitem__) for rule_ids in index.inverted]
+        self._unit_prices = [unit_price[rule_ids[0]] if rule_ids else float('inf')
+                             for rule_ids in self._by_unit_price]
+
+    def _lower_bound(self, state: Tuple[int, ...]) -> float:
+        """Compute a lower bound on the price of the remaining items.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+
+        Returns:
+            float: A price no solution for the remaining items can beat
+        """
+        return sum(count * unit_price for count, unit_price in zip(state, self._unit_prices) if count)
+
+    def _greedy(self, state: Tuple[int, ...]) -> Tuple[float, List[int]]:
+        """Build a first solution by repeatedly applying the cheapest per-item rule.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the items
+
+        Returns:
+            Tuple[float, List[int]]: The price and rule ids found, or (inf, []) if greedy gets stuck
+        """
+        price, path = 0, []
+        while any(state):
+            rule_id = next(self.index.candidates(state, self._by_unit_price), None)
+            if rule_id is None:
+                return float('inf'), []
+            price += self.index.prices[rule_id]
+            path.append(rule_id)
+            state = self.index.apply(rule_id, state)
+        return price, path
+
+    def solve(self, items: List[str]) -> Tuple[float, List[str]]:
+        """Find the best price and the rules to apply within the configured budget.
+
+        Args:
+            items (List[str]): List of items to calculate price for
+
+        Returns:
+            Tuple[float, List[str]]: The best price and the sequence of rules applied,
+            or (inf, []) if no covering was found
+        """
+        state = self.index.count(items)
+        if state is None:
+            return float('inf'), []
+        self.nodes = 0
+        self.pruned = 0
+        self.optimal = True
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        self._best_price, self._best_path = self._greedy(state)
+        self._seen: Dict[Tuple[int, ...], float] = {}
+        self._search(state, 0, [])
+        return self._best_price, [self.index.names[rule_id] for rule_id in self._best_path]
+
+    def search_subtree(self, state: Tuple[int, ...], price: float, path: List[int],
+                       shared_bound=None) -> Tuple[float, List[int], int, int]:
+        """Exhaustively search the subtree below a partial assignment.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+            price (float): The accumulated price of the bundles applied so far
+            path (List[int]): The rule ids applied so far
+            shared_bound (optional): A multiprocessing.Value holding the best price found
+                by any searcher, used for pruning and updated with every improvement
+
+        Returns:
+            Tuple[float, List[int], int, int]: The best price and full rule id path found
+            in the subtree, or (inf, []), and the number of nodes explored and pruned
+        """
+        self.nodes = 0
+        self.pruned = 0
+        self.optimal = True
+        self._deadline = None
+        self._best_price, self._best_path = float('inf'), []
+        self._seen = {}
+        self._shared_bound = shared_bound
+        try:
+            self._search(state, price, list(path))
+        finally:
+            self._shared_bound = None
+        return self._best_price, self._best_path, self.nodes, self.pruned
+
+    def _out_of_budget(self) -> bool:
+        """Check whether the node or time budget of the current solve is spent.
+
+        Returns:
+            bool: True if the search must stop
+        """
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+
+    def _visit(self, state: Tuple[int, ...], price: float, path: List[int]) -> Optional[Iterator[int]]:
+        """Count a search node, record it if it is a solution and check whether to expand it.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+            price (float): The accumulated price of the bundles applied so far
+            path (List[int]): The rule ids applied so far
+
+        Returns:
+            Optional[Iterator[int]]: The candidate rule ids to branch on, or None if the
+            node is a solution, is pruned or the budget is spent
+        """
+        if self._out_of_budget():
+            self.optimal = False
+            return None
+        self.nodes += 1
+        if not any(state):
+            if price < self._best_price:
+                self._best_price, self._best_path = price, list(path)
+                if self._shared_bound is not None:
+                    with self._shared_bound.get_lock():
+                        if price < self._shared_bound.value:
+                            self._shared_bound.value = price
+            return None
+        bound = price + self._lower_bound(state)
+        if bound >= self._best_price:
+            self.pruned += 1
+            return None
+        if self._shared_bound is not None and bound > self._shared_bound.value:
+            self.pruned += 1
+            return None
+        if self._seen.get(state, float('inf')) <= price:
+            self.pruned += 1
+            return None
+        self._seen[state] = price
+        return self.index.candidates(state, self._by_unit_price)
+
+    def _search(self, state: Tuple[int, ...], price: float, path: List[int]) -> None:
+        """Explore the bundles applicable to a state depth-first.
+
+        The nodes being expanded are kept on an explicit stack, so long baskets do
+        not hit the recursion limit, and path holds the rule ids leading to the top
+        of the stack.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+            price (float): The accumulated price of the bundles applied so far
+            path (List[int]): The rule ids applied so far
+        """
+        candidates = self._visit(state, price, path)
+        if candidates is None:
+            return
+        index = self.index
+        stack = [(state, price, candidates)]
+        while stack and self.optimal:
+            state, price, candidates = stack[-1]
+            for rule_id in candidates:
+                path.append(rule_id)
+                child, child_price = index.apply(rule_id, state), price + index.prices[rule_id]
+                children = self._visit(child, child_price, path)
+                if children is not None:
+                    stack.append((child, child_price, children))
+                    break
+                path.pop()
+                if not self.optimal:
+                    break
+            else:
+                stack.pop()
+                if stack:
+                    path.pop()
+
+
+_worker_optimizer: Optional[BranchAndBoundOptimizer] = None
+_worker_bound = None
+
+
+def _init_worker(index: RuleIndex, shared_bound) -> None:
+    """Set up the branch-and-bound searcher of a worker process."""
+    global _worker_optimizer, _worker_bound
+    _worker_optimizer = BranchAndBoundOptimizer(index)
+    _worker_bound = shared_bound
+
+
+def _search_worker(task: Tuple[Tuple[int, ...], float, List[int]]) -> Tuple[float, List[int], int, int]:
+    """Search one subtree in a worker process."""
+    state, price, path = task
+    return _worker_optimizer.search_subtree(state, price, path, _worker_bound)
+
+
+class ParallelOptimizer(BranchAndBoundOptimizer):
+    """A branch-and-bound optimizer that searches the top subtrees in worker processes.
+
+    The first split_depth levels of the search are expanded in this process and
+    every resulting subtree is searched by a ProcessPoolExecutor worker. Workers
+    share the best price found so far through shared memory and prune against it,
+    keeping ties so the result matches the serial branch-and-bound optimizer.
+
+    Attributes:
+        workers (Optional[int]): The number of worker processes
+        split_depth (int): The number of search levels expanded before splitting
+    """
+    def __init__(self, index: RuleIndex, workers: Optional[int] = None, split_depth: int = 1):
+        """Initialize the parallel optimizer.
+
+        Args:
+            index (RuleIndex): The compiled rules to search over
+            workers (Optional[int], optional): The number of worker processes. Defaults to the CPU count.
+            split_depth (int, optional): The number of levels expanded before splitting. Defaults to 1.
+        """
+        super().__init__(index)
+        self.workers = workers
+        self.split_depth = split_depth
+        self._bound = multiprocessing.Value('d', float('inf'))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _split(self, state: Tuple[int, ...], price: float, path: List[int], depth: int, tasks: List) -> None:
+        """Collect the subtrees at the split depth in serial search order.
+
+        Args:
+            state (Tuple[int, ...]): The count vector of the remaining items
+            price (float): The accumulated price of the bundles applied so far
+            path (List[int]): The rule ids applied so far
+            depth (int): The number of levels left to expand
+            tasks (List): The subtrees collected so far
+        """
+        if depth == 0 or not any(state):
+            tasks.append((state, price, list(path)))
+            return
+        for rule_id in self.index.candidates(state, self._by_unit_price):
+            path.append(rule_id)
+            self._split(self.index.apply(rule_id, state), price + self.index.prices[rule_id],
+                        path, depth - 1, tasks)
+            path.pop()
+
+    def solve(self, items: List[str]) -> Tuple[float, List[str]]:
+        """Find the best price and the rules to apply using all worker processes.
+
+        Args:
+            items (List[str]): List of items to calculate price for
+
+        Returns:
+            Tuple[float, List[str]]: The best price and the sequence of rules applied,
+            or (inf, []) if the items cannot be covered by the rules
+        """
+        state = self.index.count(items)
+        if state is None:
+            return float('inf'), []
+        self.optimal = True
+        best_price, best_path = self._greedy(state)
+        tasks: List = []
+        self._split(state, 0, [], self.split_depth, tasks)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.index, self._bound))
+            weakref.finalize(self, self._executor.shutdown)
+        self._bound.value = best_price
+        self.nodes = 0
+        self.pruned = 0
+        for price, path, nodes, pruned in self._executor.map(_search_worker, tasks):
+            self.nodes += nodes
+            self.pruned += pruned
+            if price < best_price:
+                best_price, best_path = price, path
+        return best_price, [self.index.names[rule_id] for rule_id in best_path]
+
+    def close(self) -> None:
+        """Shut down the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+OPTIMIZERS = {
+    "dp": DPOptimizer,
+    "bnb": BranchAndBoundOptimizer,
+    "parallel": ParallelOptimizer,
+}
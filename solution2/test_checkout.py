@@ -1,4 +1,5 @@
 from .checkout import Checkout
+from .index import RuleIndex
 
 def get_rules():
     return {
@@ -23,3 +24,74 @@ def test_10A():
     items = list('AAAAAAAAAA')
     result = checkout.calculate_price(items)
     assert result == 6.8
+
+
+def test_CD():
+    checkout = Checkout(get_rules())
+    items = list('CDCCDCD')
+    result = checkout.calculate_price(items)
+    assert result == 18
+    assert checkout.best_node.items == []
+
+def test_40_items():
+    checkout = Checkout(get_rules())
+    items = list('ABCD' * 10)
+    result = checkout.calculate_price(items)
+    assert result == 76.8
+
+def test_long_basket():
+    checkout = Checkout(get_rules())
+    assert round(checkout.calculate_price(['A'] * 3000), 2) == 2000
+    assert len(checkout._best_path) == 1000
+    checkout = Checkout(get_rules(), optimizer="bnb")
+    assert round(checkout.calculate_price(['A'] * 3001), 2) == 2000.8
+    assert checkout.optimizer.optimal
+
+def test_branch_and_bound():
+    checkout = Checkout(get_rules(), optimizer="bnb")
+    assert checkout.calculate_price(list('AAAAAAAAAA')) == 6.8
+    assert checkout.calculate_price(list('CDCCDCD')) == 18
+    assert checkout.optimizer.optimal
+
+def test_branch_and_bound_budget():
+    checkout = Checkout(get_rules(), optimizer="bnb", max_nodes=1)
+    result = checkout.calculate_price(list('ABCD' * 10))
+    assert result < float('inf')
+    assert not checkout.optimizer.optimal
+
+def test_rule_index():
+    index = RuleIndex(get_rules())
+    assert index.skus == ['A', 'B', 'C', 'D']
+    assert [index.names[i] for i in index.inverted[index.positions['D']]] == ['D', 'CD']
+    state = index.count('CCD')
+    assert [index.names[i] for i in index.candidates(state)] == ['C', 'CC', 'CD']
+    assert index.apply(index.names.index('CD'), state) == (0, 0, 1, 0)
+    assert index.count('AX') is None
+
+def test_scan_total():
+    checkout = Checkout(get_rules())
+    totals = []
+    for item in 'AAAAAAAAAA':
+        checkout.scan(item)
+        totals.append(checkout.total())
+    assert totals == [1, 2, 2, 3, 3.4, 4, 5, 5.4, 6, 6.8]
+    assert checkout.best_node.price == 6.8
+    assert checkout.calculate_price(list('CDCCDCD')) == 18
+    assert checkout.total() == 6.8
+
+def test_dp_memo_limit():
+    unbounded = Checkout(get_rules())
+    checkout = Checkout(get_rules(), max_memo=5)
+    for items in ['AAAAAAAAAA', 'CDCCDCD', 'ABCD' * 5, 'AAAAAAAAAA']:
+        assert checkout.calculate_price(list(items)) == unbounded.calculate_price(list(items))
+        assert len(checkout.optimizer._memo) <= 5 + checkout.optimizer.nodes
+    assert len(checkout.optimizer._memo) < len(unbounded.optimizer._memo)
+
+def test_parallel():
+    serial = Checkout(get_rules(), optimizer="bnb")
+    with Checkout(get_rules(), optimizer="parallel", workers=2) as parallel:
+        for items in ['AAAAAAAAAA', 'CDCCDCD', 'ABCD' * 5, '']:
+            assert parallel.calculate_price(list(items)) == serial.calculate_price(list(items))
+            assert parallel.best_node.items == []
+            assert parallel._best_path == serial._best_path
+    assert parallel.optimizer._executor is None
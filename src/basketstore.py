@@ -0,0 +1,303 @@
+"""Columnar on-disk store of historical baskets and a chunked re-pricing driver.
+
+A store file holds one line per distinct SKU of every basket, as three columns
+(basket offsets into the lines, SKU ids and quantities) plus the table of SKU
+strings the ids refer to::
+
+    header   "KATABSK1", basket count, line count, SKU count, SKU blob size
+    offsets  uint64 x (baskets + 1)   first line of every basket
+    sku ids  uint32 x lines           padded to 8 bytes
+    amounts  float64 x lines
+    table    uint64 x (SKUs + 1) offsets followed by the UTF-8 SKU blob
+
+Opening a store maps the file and casts the columns in place, so nothing is
+copied and re-pricing a year of baskets only keeps one chunk of them in memory::
+
+    with BasketStore("2024.baskets") as store:
+        report = reprice(store, load("candidate.csv"))
+"""
+import argparse
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+from src.catalog import Catalog
+from src.loader import load
+from src.rule import Rule
+
+MAGIC = b"KATABSK1"
+HEADER = struct.Struct("<8sQQQQ")
+
+
+class BasketStoreWriter:
+    """Appends baskets to a new store file in bounded memory.
+
+    The columns are streamed to temporary files next to the store and joined when
+    the writer is closed, so only the SKU table is held in memory.
+    """
+
+    def __init__(self, path: str):
+        """Start writing a store.
+
+        Args:
+            path (str): The path of the store file.
+        """
+        self.path = path
+        self.sku_ids: Dict[str, int] = {}
+        self.baskets = 0
+        self.lines = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        self._columns = [tempfile.TemporaryFile(dir=directory) for _ in range(3)]
+        self._columns[0].write(array('Q', [0]).tobytes())
+
+    def add(self, basket: Iterable[Tuple[str, float]]) -> None:
+        """Append a basket, merging repeated scans of the same SKU into one line.
+
+        Args:
+            basket (Iterable[Tuple[str, float]]): The (item, quantity) scans of the basket.
+        """
+        quantities: Dict[int, float] = {}
+        for item, quantity in basket:
+            sku_id = self.sku_ids.get(item)
+            if sku_id is None:
+                sku_id = self.sku_ids[item] = len(self.sku_ids)
+            quantities[sku_id] = quantities.get(sku_id, 0) + quantity
+        self._columns[1].write(array('I', quantities).tobytes())
+        self._columns[2].write(array('d', quantities.values()).tobytes())
+        self.lines += len(quantities)
+        self.baskets += 1
+        self._columns[0].write(array('Q', [self.lines]).tobytes())
+
+    def close(self) -> None:
+        """Join the columns and the SKU table into the store file.
+        """
+        blob = bytearray()
+        table = array('Q', [0])
+        for sku in self.sku_ids:
+            blob += sku.encode()
+            table.append(len(blob))
+        with open(self.path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, self.baskets, self.lines, len(self.sku_ids), len(blob)))
+            for index, column in enumerate(self._columns):
+                column.seek(0)
+                shutil.copyfileobj(column, file)
+                column.close()
+                if index == 1:
+                    file.write(bytes(-4 * self.lines % 8))
+            file.write(table.tobytes())
+            file.write(blob)
+
+    def __enter__(self) -> "BasketStoreWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_baskets(path: str, baskets: Iterable[Iterable[Tuple[str, float]]]) -> None:
+    """Write baskets to a new store file.
+
+    Args:
+        path (str): The path of the store file.
+        baskets (Iterable[Iterable[Tuple[str, float]]]): The (item, quantity) scans of every basket.
+    """
+    with BasketStoreWriter(path) as writer:
+        for basket in baskets:
+            writer.add(basket)
+
+
+class BasketStore:
+    """A read-only store of baskets memory-mapped from a store file.
+
+    Attributes:
+        offsets (memoryview): The first line of every basket, followed by the line count.
+        sku_ids (memoryview): The SKU id of every line.
+        quantities (memoryview): The quantity of every line.
+        skus (List[str]): The SKU of every id.
+    """
+
+    def __init__(self, path: str):
+        """Map a store file into memory.
+
+        Args:
+            path (str): The path of the store file.
+        """
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"Not a basket store: {path}")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, baskets, lines, skus, blob_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or size < (HEADER.size + 8 * (baskets + 1) + 4 * lines + (-4 * lines % 8) + 8 * lines
+                                     + 8 * (skus + 1) + blob_size):
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"Not a basket store: {path}")
+        view = memoryview(self._mmap)
+        start = HEADER.size
+        self.offsets = view[start:start + 8 * (baskets + 1)].cast('Q')
+        start += 8 * (baskets + 1)
+        self.sku_ids = view[start:start + 4 * lines].cast('I')
+        start += 4 * lines + (-4 * lines % 8)
+        self.quantities = view[start:start + 8 * lines].cast('d')
+        start += 8 * lines
+        table = view[start:start + 8 * (skus + 1)].cast('Q')
+        start += 8 * (skus + 1)
+        blob = bytes(view[start:start + blob_size])
+        self.skus: List[str] = [blob[table[i]:table[i + 1]].decode() for i in range(skus)]
+        table.release()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def basket(self, index: int) -> List[Tuple[str, float]]:
+        """Read one basket.
+
+        Args:
+            index (int): The position of the basket.
+
+        Returns:
+            List[Tuple[str, float]]: The SKU and total quantity of every line of the basket.
+        """
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        with self.sku_ids[start:stop] as sku_ids, self.quantities[start:stop] as quantities:
+            return [(self.skus[sku_id], quantity) for sku_id, quantity in zip(sku_ids, quantities)]
+
+    def chunks(self, size: int) -> Iterator[Tuple[memoryview, memoryview]]:
+        """Split the lines into chunks of whole baskets without copying them.
+
+        Args:
+            size (int): The number of baskets per chunk.
+
+        Yields:
+            Tuple[memoryview, memoryview]: The SKU ids and quantities of the lines of each chunk.
+        """
+        for first in range(0, len(self), size):
+            start, stop = self.offsets[first], self.offsets[min(first + size, len(self))]
+            yield self.sku_ids[start:stop], self.quantities[start:stop]
+
+    def close(self) -> None:
+        """Unmap the store file.
+        """
+        for column in (self.offsets, self.sku_ids, self.quantities):
+            column.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "BasketStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RepricingReport:
+    """The revenue of a set of baskets under a set of pricing rules.
+
+    Attributes:
+        baskets (int): The number of baskets priced.
+        lines (int): The number of basket lines priced.
+        units_by_sku (Dict[str, float]): The total quantity sold of every SKU.
+        revenue_by_sku (Dict[str, float]): The revenue of every SKU.
+        revenue_by_strategy (Dict[str, float]): The revenue of every pricing strategy class.
+    """
+
+    def __init__(self):
+        """Initialize an empty report.
+        """
+        self.baskets = 0
+        self.lines = 0
+        self.units_by_sku: Dict[str, float] = {}
+        self.revenue_by_sku: Dict[str, float] = {}
+        self.revenue_by_strategy: Dict[str, float] = {}
+
+    @property
+    def revenue(self) -> float:
+        """The total revenue, rounded to 2 decimal places."""
+        return round(sum(self.revenue_by_sku.values()), 2)
+
+    def as_dict(self) -> Dict[str, object]:
+        """Convert the report to a dictionary with amounts rounded to 2 decimal places.
+
+        Returns:
+            Dict[str, object]: The counts and revenues of the report.
+        """
+        return {"baskets": self.baskets,
+                "lines": self.lines,
+                "revenue": self.revenue,
+                "units_by_sku": self.units_by_sku,
+                "revenue_by_sku": {sku: round(revenue, 2) for sku, revenue in self.revenue_by_sku.items()},
+                "revenue_by_strategy": {name: round(revenue, 2)
+                                        for name, revenue in self.revenue_by_strategy.items()}}
+
+
+def reprice(store: BasketStore, rules: Union[Dict[str, Rule], Catalog], chunk_size: int = 65536) -> RepricingReport:
+    """Price every basket of a store and aggregate the revenue per SKU and per strategy.
+
+    The baskets are streamed in chunks. The lines of a chunk are grouped by SKU and
+    every group is priced by one batched calculate_prices call, the same way
+    BatchCheckout prices many baskets at once. Every SKU of the store must have a
+    rule, otherwise a ValueError names the missing ones before anything is priced.
+
+    Args:
+        store (BasketStore): The baskets to price.
+        rules (Union[Dict[str, Rule], Catalog]): The candidate pricing rules.
+        chunk_size (int, optional): The number of baskets per chunk. Defaults to 65536.
+
+    Returns:
+        RepricingReport: The revenue of the baskets under the rules.
+    """
+    missing = [sku for sku in store.skus if sku not in rules]
+    if missing:
+        more = f" and {len(missing) - 10} more" if len(missing) > 10 else ""
+        raise ValueError(f"SKUs missing from the catalog: {', '.join(missing[:10])}{more}")
+    store_rules = [rules[sku] for sku in store.skus]
+    units = [0.0] * len(store.skus)
+    revenue = [0.0] * len(store.skus)
+    for sku_ids, quantities in store.chunks(chunk_size):
+        groups: Dict[int, List[float]] = {}
+        for sku_id, quantity in zip(sku_ids, quantities):
+            group = groups.get(sku_id)
+            if group is None:
+                group = groups[sku_id] = []
+            group.append(int(quantity) if quantity.is_integer() else quantity)
+        for sku_id, group in groups.items():
+            units[sku_id] += sum(group)
+            revenue[sku_id] += sum(store_rules[sku_id].calculate_prices(group))
+        sku_ids.release()
+        quantities.release()
+    report = RepricingReport()
+    report.baskets = len(store)
+    report.lines = len(store.sku_ids)
+    for sku_id, sku in enumerate(store.skus):
+        if not units[sku_id]:
+            continue
+        report.units_by_sku[sku] = units[sku_id]
+        report.revenue_by_sku[sku] = revenue[sku_id]
+        name = type(store_rules[sku_id].strategy).__name__
+        report.revenue_by_strategy[name] = report.revenue_by_strategy.get(name, 0) + revenue[sku_id]
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Re-price a basket store under a catalog.")
+    parser.add_argument("store", help="path of the basket store")
+    parser.add_argument("--catalog", required=True, help="CSV or JSON catalog file to price with")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="baskets per chunk")
+    args = parser.parse_args(argv)
+
+    with BasketStore(args.store) as store:
+        report = reprice(store, load(args.catalog), args.chunk_size)
+    json.dump(report.as_dict(), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+from typing import Dict, Hashable, List, Optional, Sequence
+from src.rule import Rule
+
+class BatchCheckout:
+    """A checkout system that calculates the total prices of many baskets at once.
+    
+    Baskets are given in columnar form: one entry per scan with the basket id,
+    the item and the quantity. All quantities priced by the same rule are
+    evaluated in a single calculate_prices call.
+    
+    Attributes:
+        rules (Dict[str, Rule]): A dictionary of pricing rules for different items.
+    """
+    
+    def __init__(self, rules: Dict[str, Rule]):
+        """Initialize the batch checkout system with pricing rules.
+        
+        Args:
+            rules (Dict[str, Rule]): A dictionary of pricing rules for different items.
+        """
+        self.rules = rules
+
+    def calculate_total_prices(self,
+                               basket_ids: Sequence[Hashable],
+                               items: Sequence[str],
+                               quantities: Optional[Sequence[float]] = None) -> Dict[Hashable, float]:
+        """Calculate the total price of every basket.
+        
+        Args:
+            basket_ids (Sequence[Hashable]): The basket id of each scan.
+            items (Sequence[str]): The identifier of the item of each scan.
+            quantities (Optional[Sequence[float]], optional): The quantity of each scan. Defaults to 1 per scan.
+            
+        Returns:
+            Dict[Hashable, float]: The total price of each basket, equal to what
+            Checkout.calculate_total_price returns after scanning the same items.
+        """
+        if quantities is None:
+            quantities = [1] * len(items)
+        baskets: Dict[Hashable, Dict[str, float]] = {}
+        for basket_id, item, quantity in zip(basket_ids, items, quantities):
+            basket = baskets.get(basket_id)
+            if basket is None:
+                basket = baskets[basket_id] = {}
+            if item not in basket:
+                basket[item] = quantity
+            else:
+                basket[item] += quantity
+
+        groups: Dict[int, List] = {}
+        for basket_id, basket in baskets.items():
+            for item, quantity in basket.items():
+                rule = self.rules[item]
+                group = groups.get(id(rule))
+                if group is None:
+                    group = groups[id(rule)] = [rule, [], []]
+                group[1].append((basket, item))
+                group[2].append(quantity)
+        for rule, lines, group_quantities in groups.values():
+            for (basket, item), price in zip(lines, rule.calculate_prices(group_quantities)):
+                basket[item] = price
+
+        total_prices = {}
+        for basket_id, basket in baskets.items():
+            total_price = 0
+            for price in basket.values():
+                total_price += price
+            total_prices[basket_id] = round(total_price, 2)
+        return total_prices
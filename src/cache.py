@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Hashable, Optional
+
+class PriceCache:
+    """A bounded least-recently-used cache of calculated prices.
+    
+    The prices belong to one owner, e.g. a strategy and its version. A lookup or
+    store for another owner first drops every price, so a cache is invalidated by
+    bumping the version of its strategy. Changes of the cache hold a lock and a hit
+    tolerates its key being evicted concurrently, so a cache can be shared by
+    checkouts running on several threads; the counters may then miss a few lookups.
+    
+    Attributes:
+        capacity (int): The maximum number of prices kept.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups not found in the cache.
+        owner (Optional[Hashable]): The owner the prices belong to.
+    """
+    __slots__ = ("capacity", "hits", "misses", "owner", "_prices", "_lock")
+    
+    def __init__(self, capacity: int):
+        """Initialize an empty cache.
+        
+        Args:
+            capacity (int): The maximum number of prices kept.
+        """
+        if type(capacity) != int:
+            raise TypeError("Capacity must be a int")
+        if capacity < 1:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.owner = None
+        self._prices = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, owner: Optional[Hashable] = None) -> Optional[float]:
+        """Look a price up, marking it as recently used.
+        
+        Args:
+            key (Hashable): The key of the price.
+            owner (Optional[Hashable], optional): The owner of the price. Every price is
+                dropped if it differs from the current owner. Defaults to None.
+            
+        Returns:
+            Optional[float]: The cached price, or None if it is not cached.
+        """
+        if owner is not None and owner != self.owner:
+            with self._lock:
+                if owner != self.owner:
+                    self._prices.clear()
+                    self.owner = owner
+        price = self._prices.get(key)
+        if price is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            self._prices.move_to_end(key)
+        except KeyError:
+            pass
+        return price
+
+    def put(self, key: Hashable, price: float, owner: Optional[Hashable] = None) -> None:
+        """Store a price, evicting the least recently used one when full.
+        
+        Args:
+            key (Hashable): The key of the price.
+            price (float): The price to store.
+            owner (Optional[Hashable], optional): The owner of the price. The price is
+                dropped if it differs from the current owner. Defaults to None.
+        """
+        with self._lock:
+            if owner is not None and owner != self.owner:
+                return
+            self._prices[key] = price
+            if len(self._prices) > self.capacity:
+                self._prices.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached price, keeping the hit and miss counters.
+        """
+        with self._lock:
+            self._prices.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._prices)
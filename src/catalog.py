@@ -0,0 +1,207 @@
+import threading
+from collections.abc import Sequence
+from typing import Dict, FrozenSet, Iterator, List, Union
+from src.rule import Rule, ScheduledRule
+
+class Catalog:
+    """A compiled catalog of pricing rules with interned SKU ids.
+    
+    Every SKU is mapped to a dense integer id once, so checkouts can track their
+    scanned items by id and look rules up by position instead of by string.
+    A catalog is meant to be built once and shared by all checkouts.
+    
+    Attributes:
+        skus (List[str]): The SKU of every id.
+        sku_ids (Dict[str, int]): A dictionary mapping SKUs to their ids.
+        rules (List[Rule]): The pricing rule of every id.
+        scheduled (FrozenSet[int]): The ids of the SKUs priced by a ScheduledRule.
+    """
+    __slots__ = ("skus", "sku_ids", "rules", "scheduled")
+    
+    def __init__(self, rules: Dict[str, Rule]):
+        """Initialize the catalog from a dictionary of pricing rules.
+        
+        Args:
+            rules (Dict[str, Rule]): A dictionary of pricing rules for different items.
+        """
+        self.skus: List[str] = list(rules)
+        self.sku_ids: Dict[str, int] = {sku: sku_id for sku_id, sku in enumerate(self.skus)}
+        self.rules: List[Rule] = list(rules.values())
+        self.scheduled: FrozenSet[int] = frozenset(
+            sku_id for sku_id, rule in enumerate(self.rules) if isinstance(rule, ScheduledRule))
+
+    def __getitem__(self, sku: str) -> Rule:
+        return self.rules[self.sku_ids[sku]]
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self.sku_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.skus)
+
+    def __len__(self) -> int:
+        return len(self.skus)
+
+
+class _SkuIds(dict):
+    """The SKU ids added by a catalog version, falling back to its base for the rest."""
+    __slots__ = ("base",)
+
+    def __init__(self, added: Dict[str, int], base):
+        super().__init__(added)
+        self.base = base
+
+    def __missing__(self, sku: str) -> int:
+        return self.base[sku]
+
+    def __contains__(self, sku: str) -> bool:
+        return dict.__contains__(self, sku) or sku in self.base
+
+
+class _Overlay(Sequence):
+    """A read-only view of a base sequence with some positions replaced or appended."""
+    __slots__ = ("base", "changes", "length")
+
+    def __init__(self, base: Sequence, changes: Dict[int, object], length: int):
+        self.base = base
+        self.changes = changes
+        self.length = length
+
+    def __getitem__(self, position: int):
+        if position < 0:
+            position += self.length
+        if position in self.changes:
+            return self.changes[position]
+        if not 0 <= position < len(self.base):
+            raise IndexError("catalog index out of range")
+        return self.base[position]
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class CatalogVersion(Catalog):
+    """An immutable version of a catalog stored as a layer of changes over a base.
+    
+    The base of a version is either a plain catalog or an older version, so the
+    versions form a chain of layers and every lookup falls through the layers
+    until it finds the SKU. A layer shares everything with its base and only keeps
+    the rules changed or added in it. New SKUs get ids after the base ones, so a
+    SKU keeps its id across versions.
+    
+    Attributes:
+        version (int): The number of the version, increasing with every publish.
+        base (Catalog): The catalog or older version the changes apply to.
+        changes (Dict[int, Rule]): The rule of every SKU id changed or added in this layer.
+        root (Catalog): The plain catalog at the bottom of the chain.
+        pending (int): The number of changes in all the layers over the root.
+    """
+    __slots__ = ("version", "base", "changes", "root", "pending")
+
+    def __init__(self, version: int, base: Catalog, changes: Dict[int, Rule], added: List[str]):
+        """Initialize the version. Use VersionedCatalog.publish to create new versions.
+        
+        Args:
+            version (int): The number of the version.
+            base (Catalog): The catalog or older version the changes apply to.
+            changes (Dict[int, Rule]): The rule of every SKU id changed or added over the base.
+            added (List[str]): The SKUs added over the base, in id order.
+        """
+        self.version = version
+        self.base = base
+        self.changes = changes
+        if isinstance(base, CatalogVersion):
+            self.root = base.root
+            self.pending = base.pending + len(changes)
+        else:
+            self.root = base
+            self.pending = len(changes)
+        length = len(base) + len(added)
+        if added:
+            self.skus = _Overlay(base.skus, {len(base) + i: sku for i, sku in enumerate(added)}, length)
+            self.sku_ids = _SkuIds({sku: len(base) + i for i, sku in enumerate(added)}, base.sku_ids)
+        else:
+            self.skus = base.skus
+            self.sku_ids = base.sku_ids
+        self.rules = _Overlay(base.rules, changes, length) if changes else base.rules
+        scheduled = {sku_id for sku_id, rule in changes.items() if isinstance(rule, ScheduledRule)}
+        if scheduled or not base.scheduled.isdisjoint(changes):
+            self.scheduled = frozenset(scheduled.union(sku_id for sku_id in base.scheduled
+                                                       if sku_id not in changes))
+        else:
+            self.scheduled = base.scheduled
+
+    def added_skus(self) -> List[str]:
+        """List the SKUs added over the base, in id order.
+        
+        Returns:
+            List[str]: The added SKUs.
+        """
+        return [self.skus[sku_id] for sku_id in range(len(self.base), len(self))]
+
+
+class VersionedCatalog:
+    """A holder of the latest version of a catalog with copy-on-write publishing.
+    
+    Versions are never modified. Publishing builds a new layer from the changes
+    and swaps it in with a single reference assignment, so readers see either the
+    old or the new version and never a partial update. Checkouts pin the version
+    they were opened with unless they opt into following the latest one.
+    
+    A new layer absorbs the layers below it that are not larger than itself, like
+    a binary counter, so the chain stays logarithmic in the number of changes and
+    every change is copied a logarithmic number of times. When the changes over
+    the root grow past a fraction of the catalog, the next version is compacted
+    into a plain catalog. A publish thus costs time amortized over its own changes.
+    
+    Attributes:
+        current (CatalogVersion): The latest published version.
+    """
+
+    def __init__(self, rules: Union[Dict[str, Rule], Catalog], compact_ratio: float = 0.125):
+        """Initialize the holder with the first version.
+        
+        Args:
+            rules (Union[Dict[str, Rule], Catalog]): A dictionary of pricing rules for
+                different items, or a compiled catalog.
+            compact_ratio (float, optional): The fraction of the catalog the accumulated
+                changes may reach before the next version is compacted. Defaults to 0.125.
+        """
+        base = rules if isinstance(rules, Catalog) else Catalog(rules)
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self.current = CatalogVersion(0, base, {}, [])
+
+    def publish(self, changes: Dict[str, Rule]) -> CatalogVersion:
+        """Publish a new version with some rules changed or added.
+        
+        Args:
+            changes (Dict[str, Rule]): The new rule of every changed or added SKU.
+            
+        Returns:
+            CatalogVersion: The published version.
+        """
+        with self._lock:
+            latest = self.current
+            merged: Dict[int, Rule] = {}
+            added: List[str] = []
+            for sku, rule in changes.items():
+                if sku in latest.sku_ids:
+                    sku_id = latest.sku_ids[sku]
+                else:
+                    sku_id = len(latest) + len(added)
+                    added.append(sku)
+                merged[sku_id] = rule
+            base = latest
+            while isinstance(base, CatalogVersion) and len(base.changes) <= len(merged):
+                below = dict(base.changes)
+                below.update(merged)
+                merged = below
+                added = base.added_skus() + added
+                base = base.base
+            if latest.pending + len(changes) > max(len(latest.root) * self.compact_ratio, 64):
+                skus = list(base.skus) + added
+                rules = [merged[sku_id] if sku_id in merged else base.rules[sku_id] for sku_id in range(len(skus))]
+                base, merged, added = Catalog(dict(zip(skus, rules))), {}, []
+            self.current = CatalogVersion(latest.version + 1, base, merged, added)
+            return self.current
@@ -1,22 +1,186 @@
-from typing import List
+from array import array
+from time import perf_counter
+from typing import Dict, Iterable, Optional, Union
+from src import instrumentation
 from src.rule import Rule
+from src.catalog import Catalog, VersionedCatalog
+from src.promotion import Promotion, PromotionEngine
+from src.receipt import Receipt, ReceiptLine
+
+# Catalogs up to this size keep a dense line per SKU id in every basket.
+DENSE_SKUS = 32
+# The unpriced dense lines of every catalog size, copied by new checkouts.
+_EMPTY_PRICES = [array('d', bytes(8 * skus)) for skus in range(DENSE_SKUS + 1)]
+# Values of Checkout._dirty besides the position of the one dirty line.
+CLEAN = -1
+ALL_DIRTY = -2
 
 class Checkout:
     """A checkout system that calculates total price based on pricing rules.
     
+    The basket is a list of quantities and a compact array of the prices of the
+    same lines. For a catalog of at most DENSE_SKUS SKUs there is a line per SKU
+    id. For a larger catalog the lines hold the SKUs of the basket in scan order
+    and an array holds their ids, so an open basket costs memory proportional to
+    its distinct items rather than to the catalog.
+    The price of every line is cached. A scan only marks its line dirty, and a
+    second dirty line before the total is read marks all of them dirty. Reading
+    the total re-prices the one dirty line, or every line, and adds up the price
+    array, so showing the total after each scan prices a single SKU. The
+    cross-SKU promotions are re-allocated only for the components with dirty lines.
+    SKUs with a scheduled rule remember the window they were priced in, and are
+    re-priced when their active window changes. A checkout following a versioned
+    catalog switches to each newly published version and re-prices its items.
+    
     Attributes:
-        rules (List[Rule]): A list of pricing rules for different items.
-        scanned_items (dict): A dictionary tracking scanned items and their quantities.
+        rules (Catalog): The compiled catalog of pricing rules for different items.
+        money_mode (str): "float" to price with floats or "cents" to price exactly in integer cents.
+        promotions (Optional[PromotionEngine]): The cross-SKU promotions, if any.
     """
+    __slots__ = ("rules", "money_mode", "promotions", "_ids", "_index", "_quantities", "_prices",
+                 "_adjustments", "_windows", "_source", "_dirty")
     
-    def __init__(self, rules: List[Rule]):
+    def __init__(self, rules: Union[Dict[str, Rule], Catalog, VersionedCatalog], money_mode: str = "float",
+                 promotions: Optional[Union[Iterable[Promotion], PromotionEngine]] = None,
+                 follow_latest: bool = False):
         """Initialize the checkout system with pricing rules.
         
         Args:
-            rules (List[Rule]): A list of pricing rules for different items.
+            rules (Union[Dict[str, Rule], Catalog, VersionedCatalog]): A dictionary of pricing
+                rules for different items, a compiled catalog to share between checkouts, or
+                a versioned catalog whose current version is used.
+            money_mode (str, optional): "float" or "cents". Defaults to "float".
+            promotions (Optional[Union[Iterable[Promotion], PromotionEngine]], optional):
+                Cross-SKU promotions, or an engine compiled against the same catalog to
+                share between checkouts. Defaults to None.
+            follow_latest (bool, optional): Whether to switch to every version published to
+                a versioned catalog instead of pinning the current one. Defaults to False.
         """
+        if money_mode not in ("float", "cents"):
+            raise ValueError(f"Unknown money mode: {money_mode}")
+        self._source = None
+        if type(rules) is not Catalog:
+            if isinstance(rules, VersionedCatalog):
+                if follow_latest:
+                    self._source = rules
+                rules = rules.current
+            if not isinstance(rules, Catalog):
+                rules = Catalog(rules)
         self.rules = rules
-        self.scanned_items = {}
+        self.money_mode = money_mode
+        if promotions is None:
+            self.promotions = self._adjustments = None
+        else:
+            if not isinstance(promotions, PromotionEngine):
+                promotions = PromotionEngine(rules, promotions)
+            self.promotions = promotions
+            self._adjustments = [0] * len(promotions.components)
+        skus = len(rules.skus)
+        if skus <= DENSE_SKUS and self._source is None:
+            self._ids = None
+            self._quantities = [0] * skus
+            self._prices = _EMPTY_PRICES[skus][:]
+        else:
+            self._ids = array('q')
+            self._quantities = []
+            self._prices = array('d')
+        self._index = None
+        self._windows = None
+        self._dirty = CLEAN
+
+    @property
+    def scanned_items(self) -> Dict[str, float]:
+        """A dictionary of the scanned items and their quantities."""
+        skus = self.rules.skus
+        return {skus[sku_id]: quantity for sku_id, _, quantity in self._lines()}
+
+    def _items(self):
+        """Iterate over the scanned SKU ids and their quantities.
+        
+        Yields:
+            Tuple[int, float]: The SKU id and its quantity, as an int when it is integral.
+        """
+        for sku_id, _, quantity in self._lines():
+            yield sku_id, quantity
+
+    def _lines(self):
+        """Iterate over the lines with a quantity.
+        
+        Yields:
+            Tuple[int, int, float]: The SKU id, the position of the line and its quantity,
+            as an int when it is integral.
+        """
+        ids = self._ids
+        for position, quantity in enumerate(self._quantities):
+            if quantity:
+                if type(quantity) is float and quantity.is_integer():
+                    quantity = int(quantity)
+                yield position if ids is None else ids[position], position, quantity
+
+    def _find(self, sku_id: int) -> Optional[int]:
+        """Find the line of a SKU in a sparse basket.
+        
+        Args:
+            sku_id (int): The id of the SKU.
+            
+        Returns:
+            Optional[int]: The position of the line, or None if the basket has none.
+        """
+        if self._index is not None:
+            return self._index.get(sku_id)
+        try:
+            return self._ids.index(sku_id)
+        except ValueError:
+            return None
+
+    def _position(self, sku_id: int) -> int:
+        """Find the line of a SKU in a sparse basket, adding an empty one if it has none.
+        
+        Baskets with more than DENSE_SKUS lines index them by SKU id, so finding a
+        line does not search the ids of a large basket.
+        
+        Args:
+            sku_id (int): The id of the SKU.
+            
+        Returns:
+            int: The position of the line.
+        """
+        ids = self._ids
+        index = self._index
+        if index is not None:
+            position = index.get(sku_id)
+        elif sku_id in ids:
+            position = ids.index(sku_id)
+        else:
+            position = None
+        if position is None:
+            position = len(ids)
+            ids.append(sku_id)
+            self._quantities.append(0)
+            self._prices.append(0.0)
+            if index is not None:
+                index[sku_id] = position
+            elif position >= DENSE_SKUS:
+                self._index = {sku_id: position for position, sku_id in enumerate(ids)}
+        return position
+
+    def _quantities_of(self, sku_ids: Iterable[int]) -> Dict[int, float]:
+        """Collect the scanned quantities of some SKUs.
+        
+        Args:
+            sku_ids (Iterable[int]): The ids of the SKUs.
+            
+        Returns:
+            Dict[int, float]: The quantity of every one of the SKUs.
+        """
+        quantities = self._quantities
+        if self._ids is None:
+            return {sku_id: quantities[sku_id] for sku_id in sku_ids}
+        result = {}
+        for sku_id in sku_ids:
+            position = self._find(sku_id)
+            result[sku_id] = 0 if position is None else quantities[position]
+        return result
 
     def scan(self, item: str, quantity: float = 1):
         """Scan an item and add it to the checkout.
@@ -25,20 +189,162 @@ class Checkout:
             item (str): The identifier of the item being scanned.
             quantity (float, optional): The quantity of the item. Defaults to 1.
         """
-        if item not in self.scanned_items:
-            self.scanned_items[item] = quantity
+        start = perf_counter() if instrumentation.enabled else None
+        if self._ids is None:
+            position = self.rules.sku_ids[item]
         else:
-            self.scanned_items[item] += quantity
+            if self._source is not None and self._source.current is not self.rules:
+                self._switch(self._source.current)
+            position = self._position(self.rules.sku_ids[item])
+        self._quantities[position] += quantity
+        dirty = self._dirty
+        if dirty != ALL_DIRTY and dirty != position:
+            self._dirty = position if dirty == CLEAN else ALL_DIRTY
+        if start is not None:
+            instrumentation.record("checkout.scan", perf_counter() - start)
+
+    def _switch(self, catalog: Catalog):
+        """Move the scanned items to another version of the catalog and mark them dirty.
+        
+        Args:
+            catalog (Catalog): The version to switch to.
+        """
+        self.rules = catalog
+        if self._windows is not None:
+            self._windows = {sku_id: window for sku_id, window in self._windows.items()
+                             if sku_id in catalog.scheduled} or None
+        self._dirty = ALL_DIRTY
+
+    def _expire_windows(self):
+        """Mark the lines of the scheduled SKUs whose active window changed as dirty.
+        """
+        rules = self.rules.rules
+        for sku_id, window in self._windows.items():
+            if rules[sku_id].active_window() != window:
+                position = sku_id if self._ids is None else self._find(sku_id)
+                if self._dirty != position:
+                    self._dirty = position if self._dirty == CLEAN else ALL_DIRTY
+
+    def _refresh(self):
+        """Re-price the dirty lines and update the running total.
+        """
+        quantities = self._quantities
+        prices = self._prices
+        if self._dirty == ALL_DIRTY:
+            dirty = [position for position, quantity in enumerate(quantities) if quantity or prices[position]]
+        else:
+            dirty = (self._dirty,)
+        ids = self._ids
+        rules = self.rules.rules
+        scheduled = self.rules.scheduled
+        cents = self.money_mode == "cents"
+        instrumented = instrumentation.enabled
+        for position in dirty:
+            sku_id = position if ids is None else ids[position]
+            item_quantity = quantities[position]
+            if type(item_quantity) is float and item_quantity.is_integer():
+                item_quantity = int(item_quantity)
+            rule = rules[sku_id]
+            if scheduled and sku_id in scheduled:
+                if self._windows is None:
+                    self._windows = {}
+                self._windows[sku_id] = rule.active_window()
+            if instrumented:
+                start = perf_counter()
+            if cents:
+                price = rule.calculate_price_cents(item_quantity)
+            else:
+                price = rule.calculate_price(item_quantity)
+            if instrumented:
+                elapsed = perf_counter() - start
+                instrumentation.record(f"strategy.{type(rule.strategy).__name__}", elapsed)
+                instrumentation.record(f"sku.{self.rules.skus[sku_id]}", elapsed)
+            prices[position] = price
+        if self.promotions is not None:
+            components = self.promotions.components
+            component_of = self.promotions.component_of
+            adjustments = self._adjustments
+            for component in {component_of[sku_id] for sku_id in
+                              (position if ids is None else ids[position] for position in dirty)
+                              if sku_id in component_of}:
+                adjustments[component] = self.promotions.adjustment(
+                    component, self._quantities_of(components[component]), cents, rules)
+        self._dirty = CLEAN
+
+    def _total(self) -> float:
+        """Add up the cached prices of the lines and the promotion adjustments.
+        
+        Returns:
+            float: The total price, in integer cents in cents money mode.
+        """
+        total = sum(self._prices)
+        if self._adjustments:
+            total += sum(self._adjustments)
+        return int(total) if self.money_mode == "cents" else total
+
+    def _update(self):
+        """Bring the cached prices and the running total up to date.
+        """
+        if self._source is not None and self._source.current is not self.rules:
+            self._switch(self._source.current)
+        if self._windows:
+            self._expire_windows()
+        if self._dirty != CLEAN:
+            self._refresh()
 
     def calculate_total_price(self) -> float:
         """Calculate the total price of all scanned items.
         
         Returns:
-            float: The total price calculated based on the pricing rules.
-        """
-        total_price = 0
-        for item in self.scanned_items:
-            item_rule = self.rules[item]
-            item_quantity = self.scanned_items[item]
-            total_price += item_rule.calculate_price(item_quantity)
-        return total_price
+            float: The total price calculated based on the pricing rules, rounded to 2 decimal places.
+        """
+        if self.money_mode == "cents":
+            return self.calculate_total_cents() / 100
+        self._update()
+        return round(self._total(), 2)
+
+    def calculate_total_cents(self) -> int:
+        """Calculate the exact total price of all scanned items in integer cents.
+        
+        Returns:
+            int: The total price in cents calculated based on the pricing rules.
+        """
+        if self.money_mode == "cents":
+            self._update()
+            return self._total()
+        if self._source is not None and self._source.current is not self.rules:
+            self._switch(self._source.current)
+        rules = self.rules.rules
+        total_cents = 0
+        for sku_id, item_quantity in self._items():
+            total_cents += rules[sku_id].calculate_price_cents(item_quantity)
+        if self.promotions is not None:
+            for component, sku_ids in enumerate(self.promotions.components):
+                total_cents += self.promotions.adjustment(component, self._quantities_of(sku_ids), True, rules)
+        return total_cents
+
+    def receipt(self) -> Receipt:
+        """Build the line-item breakdown of the checkout from the cached prices.
+        
+        The breakdown is only built when requested and reuses the prices of the
+        running total, so the items are never priced a second time.
+        
+        Returns:
+            Receipt: The line of every scanned SKU, in money mode units.
+        """
+        self._update()
+        rules = self.rules.rules
+        skus = self.rules.skus
+        cents = self.money_mode == "cents"
+        lines = []
+        for sku_id, position, item_quantity in self._lines():
+            price = self._prices[position]
+            strategy = rules[sku_id].strategy
+            sets, free_units = strategy.applied_sets(item_quantity)
+            lines.append(ReceiptLine(skus[sku_id], item_quantity, type(strategy).__name__,
+                                     int(price) if cents else price,
+                                     strategy.calculate_regular_price(item_quantity, cents), sets, free_units))
+        promotion_savings = -sum(self._adjustments) if self._adjustments else 0
+        if cents:
+            return Receipt(lines, promotion_savings, self._total(), self.money_mode)
+        return Receipt(lines, round(promotion_savings, 2), round(self._total(), 2), self.money_mode)
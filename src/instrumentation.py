@@ -0,0 +1,94 @@
+"""Opt-in instrumentation of scan and pricing latency.
+
+Instrumentation is off by default. Instrumented code paths only check the
+module-level ``enabled`` flag while it is off, so the disabled cost is one
+attribute lookup per call::
+
+    from src import instrumentation
+    instrumentation.enable()
+    ...
+    instrumentation.dump_json("stats.json")
+
+Timers keep a call count, the total time and a latency histogram with
+power-of-two microsecond buckets. Counters keep plain totals.
+"""
+import json
+from typing import Dict, List
+
+enabled = False
+
+_timers: Dict[str, List] = {}
+_counters: Dict[str, int] = {}
+
+BUCKETS = 32
+
+
+def enable() -> None:
+    """Start recording."""
+    global enabled
+    enabled = True
+
+
+def disable() -> None:
+    """Stop recording, keeping what was recorded so far."""
+    global enabled
+    enabled = False
+
+
+def reset() -> None:
+    """Drop everything recorded so far."""
+    _timers.clear()
+    _counters.clear()
+
+
+def record(name: str, seconds: float) -> None:
+    """Record one timed call.
+    
+    Args:
+        name (str): The name of the timer, e.g. "checkout.scan".
+        seconds (float): The duration of the call.
+    """
+    timer = _timers.get(name)
+    if timer is None:
+        timer = _timers[name] = [0, 0.0, [0] * BUCKETS]
+    timer[0] += 1
+    timer[1] += seconds
+    timer[2][min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a counter.
+    
+    Args:
+        name (str): The name of the counter, e.g. "solution2.bnb.nodes".
+        amount (int, optional): The amount to add. Defaults to 1.
+    """
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def stats() -> dict:
+    """Return everything recorded so far.
+    
+    Returns:
+        dict: The timers, with count, total and mean seconds and a histogram keyed by
+        the upper bound of each bucket in microseconds, and the counters.
+    """
+    timers = {}
+    for name, (calls, total, histogram) in _timers.items():
+        timers[name] = {
+            "count": calls,
+            "total_seconds": total,
+            "mean_seconds": total / calls,
+            "histogram_us": {f"<{1 << bucket}": hits for bucket, hits in enumerate(histogram) if hits},
+        }
+    return {"timers": timers, "counters": dict(_counters)}
+
+
+def dump_json(path: str) -> None:
+    """Write everything recorded so far as JSON.
+    
+    Args:
+        path (str): The path of the JSON file.
+    """
+    with open(path, "w") as file:
+        json.dump(stats(), file, indent=2, sort_keys=True)
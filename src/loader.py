@@ -0,0 +1,328 @@
+"""Load pricing catalogs from CSV/JSON files and compiled binary snapshots.
+
+A catalog file has one row per SKU with the columns ``sku``, ``strategy``,
+``price`` and the parameters of that strategy::
+
+    sku,strategy,price,buy_quantity,free_quantity
+    A,regular,1.1,,
+    D,buy_n_get_m_free,3,2,1
+
+A snapshot stores the same catalog as fixed-width struct arrays (strategy code
+and parameters per SKU plus a sorted SKU string table). Loading it maps the
+file into memory and builds rules only when their SKU is first looked up.
+"""
+import csv
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterator, Optional, Sequence
+from src.catalog import Catalog
+from src.rule import Rule
+from src.strategy import (RegularPricing,
+                          DiscountPricing,
+                          NDiscountMPricing,
+                          BuyNGetMFreePricing,
+                          NForMPricing,
+                          WeightPricing)
+
+# Strategy name -> (code, class, parameters after price, parameter types).
+STRATEGY_TYPES = {
+    "regular": (0, RegularPricing, (), ()),
+    "discount": (1, DiscountPricing, ("discount",), (int,)),
+    "n_discount_m": (2, NDiscountMPricing, ("buy_quantity", "discount"), (int, int)),
+    "buy_n_get_m_free": (3, BuyNGetMFreePricing, ("buy_quantity", "free_quantity"), (int, int)),
+    "n_for_m": (4, NForMPricing, ("buy_quantity", "m_price"), (int, float)),
+    "weight": (5, WeightPricing, ("weight",), (float,)),
+}
+STRATEGY_CODES = {code: name for name, (code, _, _, _) in STRATEGY_TYPES.items()}
+STRATEGY_NAMES = {cls: name for name, (_, cls, _, _) in STRATEGY_TYPES.items()}
+
+MAGIC = b"KATACAT1"
+HEADER = struct.Struct("<8sQQ")
+
+
+def _number(value, kind: type, column: str, row: int):
+    """Convert a cell to a number of the given kind, reporting its row on failure."""
+    if isinstance(value, str):
+        try:
+            value = int(value) if kind is int else float(value)
+        except ValueError:
+            raise ValueError(f"Row {row}: {column} must be a {kind.__name__}, got {value!r}") from None
+    if kind is int and type(value) != int:
+        raise TypeError(f"Row {row}: {column} must be a int")
+    if type(value) not in (int, float):
+        raise TypeError(f"Row {row}: {column} must be a number")
+    return value
+
+
+def rules_from_records(records: Sequence[dict]) -> Dict[str, Rule]:
+    """Build pricing rules from catalog records.
+    
+    Every record is converted and built in a single pass. The strategy
+    constructors validate the values, and every error reports the offending row.
+    
+    Args:
+        records (Sequence[dict]): The catalog rows with sku, strategy, price and parameters.
+        
+    Returns:
+        Dict[str, Rule]: A dictionary of pricing rules for different items.
+    """
+    rules: Dict[str, Rule] = {}
+    for row, record in enumerate(records):
+        kind = STRATEGY_TYPES.get(record["strategy"])
+        if kind is None:
+            raise ValueError(f"Row {row}: unknown strategy {record['strategy']!r}")
+        _, cls, names, types = kind
+        arguments = [_number(record["price"], float, "price", row)]
+        arguments += [_number(record.get(name), kind, name, row) for name, kind in zip(names, types)]
+        try:
+            rule = Rule(cls(*arguments))
+        except (TypeError, ValueError) as error:
+            raise type(error)(f"Row {row}: {error}") from None
+        if rules.setdefault(record["sku"], rule) is not rule:
+            raise ValueError(f"Row {row}: Duplicate SKU {record['sku']!r} in catalog")
+    return rules
+
+
+def load_catalog(path: str) -> Catalog:
+    """Load a catalog from a CSV or JSON file.
+    
+    Args:
+        path (str): The path of a .csv file, or a .json file holding a list of records.
+        
+    Returns:
+        Catalog: The compiled catalog.
+    """
+    with open(path, newline="") as file:
+        if path.endswith(".json"):
+            records = json.load(file)
+        else:
+            records = [{key: value for key, value in record.items() if value != ""}
+                       for record in csv.DictReader(file)]
+    return Catalog(rules_from_records(records))
+
+
+def save_snapshot(catalog: Catalog, path: str) -> None:
+    """Write a catalog as a compiled binary snapshot.
+    
+    Only plain rules of a single strategy can be written, as a snapshot stores
+    one fixed strategy per SKU.
+    
+    Args:
+        catalog (Catalog): The catalog to write.
+        path (str): The path of the snapshot file.
+    """
+    order = sorted(range(len(catalog)), key=lambda sku_id: catalog.skus[sku_id].encode())
+    codes = array('B')
+    parameters = array('d')
+    offsets = array('Q', [0])
+    blob = bytearray()
+    for sku_id in order:
+        rule = catalog.rules[sku_id]
+        if type(rule) is not Rule:
+            raise TypeError(f"Cannot snapshot rule {type(rule).__name__}")
+        strategy = rule.strategy
+        name = STRATEGY_NAMES.get(type(strategy))
+        if name is None:
+            raise TypeError(f"Cannot snapshot strategy {type(strategy).__name__}")
+        code, _, names, _ = STRATEGY_TYPES[name]
+        codes.append(code)
+        values = [strategy.price] + [getattr(strategy, name) for name in names]
+        parameters.extend(values + [0.0] * (3 - len(values)))
+        blob += catalog.skus[sku_id].encode()
+        offsets.append(len(blob))
+    codes.extend([0] * (-len(codes) % 8))
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(order), len(blob)))
+        file.write(codes.tobytes())
+        file.write(parameters.tobytes())
+        file.write(offsets.tobytes())
+        file.write(blob)
+
+
+class _SkuTable:
+    """A read-only SKU -> id mapping over the sorted SKU strings of a snapshot."""
+    __slots__ = ("_offsets", "_blob", "_found")
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+        self._found: Dict[str, int] = {}
+
+    def key(self, sku_id: int) -> bytes:
+        return self._blob[self._offsets[sku_id]:self._offsets[sku_id + 1]].tobytes()
+
+    def sku(self, sku_id: int) -> str:
+        return self.key(sku_id).decode()
+
+    def __getitem__(self, sku: str) -> int:
+        sku_id = self._found.get(sku)
+        if sku_id is None:
+            key = sku.encode()
+            sku_id = self._search(key)
+            if sku_id is None:
+                raise KeyError(sku)
+            self._found[sku] = sku_id
+        return sku_id
+
+    def _search(self, key: bytes) -> Optional[int]:
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self.key(low) == key:
+            return low
+        return None
+
+    def get(self, sku: str, default=None):
+        try:
+            return self[sku]
+        except KeyError:
+            return default
+
+    def __contains__(self, sku: str) -> bool:
+        return self.get(sku) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.sku(sku_id) for sku_id in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class _SkuList:
+    """A read-only list of the SKU of every id of a snapshot."""
+    __slots__ = ("_table",)
+
+    def __init__(self, table: _SkuTable):
+        self._table = table
+
+    def __getitem__(self, sku_id: int) -> str:
+        return self._table.sku(sku_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class _RuleList:
+    """A read-only list of the rule of every id of a snapshot, built on first access."""
+    __slots__ = ("_codes", "_parameters", "_built")
+
+    def __init__(self, codes: memoryview, parameters: memoryview):
+        self._codes = codes
+        self._parameters = parameters
+        self._built: Dict[int, Rule] = {}
+
+    def __getitem__(self, sku_id: int) -> Rule:
+        rule = self._built.get(sku_id)
+        if rule is None:
+            if not 0 <= sku_id < len(self):
+                raise IndexError(sku_id)
+            _, cls, _, types = STRATEGY_TYPES[STRATEGY_CODES[self._codes[sku_id]]]
+            values = self._parameters[3 * sku_id:3 * sku_id + 1 + len(types)].tolist()
+            arguments = [values[0]] + [kind(value) for kind, value in zip(types, values[1:])]
+            rule = self._built[sku_id] = Rule(cls(*arguments))
+        return rule
+
+    def __iter__(self) -> Iterator[Rule]:
+        return (self[sku_id] for sku_id in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+class SnapshotCatalog(Catalog):
+    """A catalog memory-mapped from a compiled snapshot.
+    
+    SKU ids are positions in the sorted SKU table. Looking a SKU up is a binary
+    search over the mapped strings, and its rule is built on first access, so
+    opening a snapshot costs nothing proportional to the catalog size.
+    """
+    __slots__ = ("_file", "_mmap", "_views")
+
+    def __init__(self, path: str):
+        """Map a snapshot file into memory.
+        
+        Args:
+            path (str): The path of the snapshot file.
+        """
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"Not a catalog snapshot: {path}")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, blob_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or size < HEADER.size + count + (-count % 8) + 32 * count + 8 + blob_size:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"Not a catalog snapshot: {path}")
+        view = memoryview(self._mmap)
+        start = HEADER.size
+        codes = view[start:start + count]
+        start += count + (-count % 8)
+        parameters = view[start:start + 24 * count].cast('d')
+        start += 24 * count
+        offsets = view[start:start + 8 * (count + 1)].cast('Q')
+        start += 8 * (count + 1)
+        blob = view[start:start + blob_size]
+        self._views = (codes, parameters, offsets, blob, view)
+        table = _SkuTable(offsets, blob)
+        self.sku_ids = table
+        self.skus = _SkuList(table)
+        self.rules = _RuleList(codes, parameters)
+        self.scheduled = frozenset()
+
+    def close(self) -> None:
+        """Unmap the snapshot file. Rules already built stay usable.
+        """
+        for view in self._views:
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_snapshot(path: str) -> SnapshotCatalog:
+    """Map a compiled catalog snapshot.
+    
+    Args:
+        path (str): The path of the snapshot file.
+        
+    Returns:
+        SnapshotCatalog: The catalog backed by the mapped file.
+    """
+    return SnapshotCatalog(path)
+
+
+def load(path: str, snapshot_path: Optional[str] = None) -> Catalog:
+    """Load a catalog, using its snapshot when it is newer than the catalog file.
+    
+    A missing or stale snapshot is rebuilt from the catalog file, so only the
+    first start after a catalog change pays for parsing and validation.
+    
+    Args:
+        path (str): The path of the CSV or JSON catalog file.
+        snapshot_path (Optional[str], optional): The path of the snapshot. Defaults to path + ".snapshot".
+        
+    Returns:
+        Catalog: The loaded catalog.
+    """
+    snapshot_path = snapshot_path or path + ".snapshot"
+    if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= os.path.getmtime(path):
+        return load_snapshot(snapshot_path)
+    save_snapshot(load_catalog(path), snapshot_path)
+    return load_snapshot(snapshot_path)
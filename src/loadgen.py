@@ -0,0 +1,136 @@
+"""A load generator for the checkout server measuring scan latency and throughput.
+
+Without --host/--port or --unix a local server is started in-process, so the
+whole measurement runs on one box without any outside service:
+
+    python -m src.loadgen --clients 32 --baskets 20 --items 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+from src.server import CheckoutServer, example_rules
+
+class CheckoutClient:
+    """A client for one connection to the checkout server."""
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None) -> "CheckoutClient":
+        """Open a connection over TCP, or over a Unix socket if a path is given."""
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request) -> dict:
+        """Send one request and wait for its reply."""
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        reply = json.loads(await self.reader.readline())
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    async def open(self) -> None:
+        await self.request(op="open")
+
+    async def scan(self, item: str, quantity: float = 1) -> None:
+        await self.request(op="scan", item=item, quantity=quantity)
+
+    async def total(self) -> float:
+        return (await self.request(op="total"))["total"]
+
+    async def close(self) -> float:
+        return (await self.request(op="close"))["total"]
+
+    async def disconnect(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    """Return the given percentile of sorted latencies."""
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+async def run_load(clients: int = 8,
+                   baskets: int = 10,
+                   items: int = 20,
+                   skus: str = "ABCDE",
+                   host: str = "127.0.0.1",
+                   port: int = 8765,
+                   unix: Optional[str] = None) -> Dict[str, float]:
+    """Drive concurrent clients scanning baskets and measure scan latency.
+    
+    Args:
+        clients (int, optional): The number of concurrent connections. Defaults to 8.
+        baskets (int, optional): The number of baskets each client checks out. Defaults to 10.
+        items (int, optional): The number of scans per basket. Defaults to 20.
+        skus (str, optional): The items to scan at random. Defaults to "ABCDE".
+        host (str, optional): The server host. Defaults to "127.0.0.1".
+        port (int, optional): The server port. Defaults to 8765.
+        unix (Optional[str], optional): The server Unix socket, used instead of TCP if given.
+        
+    Returns:
+        Dict[str, float]: The number of scans, scans per second and p50/p99 latency in milliseconds.
+    """
+    latencies: List[float] = []
+
+    async def run_client(seed: int) -> None:
+        rng = random.Random(seed)
+        client = await CheckoutClient.connect(host, port, unix)
+        for _ in range(baskets):
+            await client.open()
+            for _ in range(items):
+                start = time.perf_counter()
+                await client.scan(rng.choice(skus))
+                latencies.append(time.perf_counter() - start)
+            await client.close()
+        await client.disconnect()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "scans": len(latencies),
+        "scans_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_local(**options) -> Dict[str, float]:
+    """Run the load against a checkout server started in this process."""
+    listener = await CheckoutServer(example_rules()).start()
+    async with listener:
+        port = listener.sockets[0].getsockname()[1]
+        return await run_load(port=port, **options)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure checkout server scan latency.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--unix", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--baskets", type=int, default=10)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args(argv)
+    options = {"clients": args.clients, "baskets": args.baskets, "items": args.items}
+    if args.port is None and args.unix is None:
+        stats = asyncio.run(run_local(**options))
+    else:
+        stats = asyncio.run(run_load(host=args.host, port=args.port or 8765, unix=args.unix, **options))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+from itertools import islice
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from src import instrumentation
+from src.catalog import Catalog
+from src.rule import Rule
+from src.utils import check_price, check_quantity, to_cents
+
+class Promotion:
+    """Base class for promotions spanning several SKUs.
+
+    A promotion replaces the regular price of the units it consumes with a fixed
+    bundle price. The units it does not consume keep their own pricing rules.
+
+    Attributes:
+        skus (Tuple[str, ...]): The SKUs the promotion can consume.
+        price (float): The price of one application of the promotion.
+        price_cents (int): The price of one application in integer cents.
+    """
+    __slots__ = ("skus", "price", "price_cents")
+
+    def __init__(self, skus: Iterable[str], price: float):
+        """Initialize the promotion.
+
+        Args:
+            skus (Iterable[str]): The SKUs the promotion can consume.
+            price (float): The price of one application of the promotion.
+        """
+        check_price(price)
+        self.skus = tuple(dict.fromkeys(skus))
+        if not self.skus:
+            raise ValueError("Promotion must contain at least one SKU")
+        self.price_cents = to_cents(price)
+        self.price = self.price_cents / 100
+
+    def consumptions(self, available: Tuple[int, ...],
+                     order: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, ...]]:
+        """Yield every way of applying the promotion once.
+
+        Args:
+            available (Tuple[int, ...]): The units of each of the promotion SKUs left.
+            order (Optional[Sequence[int]], optional): The positions of the promotion SKUs
+                to consume first, e.g. the most expensive ones. Defaults to their order.
+
+        Yields:
+            Tuple[int, ...]: The units of each of the promotion SKUs consumed.
+        """
+        pass
+
+
+class BundlePromotion(Promotion):
+    """A fixed bundle of SKUs for a price, e.g. a C+D meal deal for $5.
+
+    Attributes:
+        quantities (Tuple[int, ...]): The units of each SKU in the bundle.
+    """
+    __slots__ = ("quantities",)
+
+    def __init__(self, items: Dict[str, int], price: float):
+        """Initialize the bundle.
+
+        Args:
+            items (Dict[str, int]): The number of units of each SKU in the bundle.
+            price (float): The price of the bundle.
+        """
+        super().__init__(items, price)
+        self.quantities = tuple(check_quantity(items[sku]) for sku in self.skus)
+        if not any(self.quantities):
+            raise ValueError("Bundle must contain at least one item")
+
+    def consumptions(self, available: Tuple[int, ...],
+                     order: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, ...]]:
+        if all(units >= need for units, need in zip(available, self.quantities)):
+            yield self.quantities
+
+
+class MixAndMatchPromotion(Promotion):
+    """Any N units from a group of SKUs for a price, e.g. any 3 from A, B or C for $10.
+
+    Attributes:
+        quantity (int): The number of units in one application.
+    """
+    __slots__ = ("quantity",)
+
+    def __init__(self, skus: Iterable[str], quantity: int, price: float):
+        """Initialize the mix-and-match promotion.
+
+        Args:
+            skus (Iterable[str]): The group of SKUs the units can be picked from.
+            quantity (int): The number of units in one application.
+            price (float): The price of one application.
+        """
+        super().__init__(skus, price)
+        self.quantity = check_quantity(quantity)
+        if not quantity:
+            raise ValueError("Quantity must be positive")
+
+    def consumptions(self, available: Tuple[int, ...],
+                     order: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, ...]]:
+        """Yield the feasible picks, taking as many units as possible of the SKUs
+        earliest in order first.
+
+        Every pick is derived from the previous one in O(len(skus)) by giving up one
+        unit of the latest SKU whose units the SKUs after it can replace, so taking
+        the first k picks costs O(k * len(skus)) however many picks there are.
+        """
+        order = [position for position in (range(len(self.skus)) if order is None else order)
+                 if available[position]]
+        supply = [0] * (len(order) + 1)
+        for index in range(len(order) - 1, -1, -1):
+            supply[index] = supply[index + 1] + available[order[index]]
+        if supply[0] < self.quantity:
+            return
+        counts = [0] * len(order)
+
+        def fill(start: int, missing: int) -> None:
+            for index in range(start, len(order)):
+                counts[index] = min(available[order[index]], missing)
+                missing -= counts[index]
+
+        fill(0, self.quantity)
+        while True:
+            consumed = [0] * len(self.skus)
+            for position, units in zip(order, counts):
+                consumed[position] = units
+            yield tuple(consumed)
+            tail = 0
+            for index in range(len(order) - 2, -1, -1):
+                tail += counts[index + 1]
+                if counts[index] and supply[index + 1] > tail:
+                    counts[index] -= 1
+                    fill(index + 1, tail + 1)
+                    break
+            else:
+                return
+
+
+class PromotionEngine:
+    """Allocates units to promotions so the customer pays the lowest total.
+
+    Promotions sharing a SKU are grouped into components that are priced
+    independently. A component with a single promotion is solved exactly in
+    polynomial time: a scan over the number of applications for a bundle, and a
+    min-plus knapsack over the group SKUs for a mix-and-match promotion. Only
+    components of overlapping promotions fall back to a memoized search over the
+    consumed units. Every state expands at most max_children applications of each
+    promotion, the ones consuming the units with the highest regular price first,
+    so a promotion with many ways to apply cannot crowd out the others. The search
+    expands at most max_states new states and keeps the best allocation found so
+    far, clearing optimal when it is cut short.
+
+    Attributes:
+        catalog (Catalog): The catalog the promotions are priced against.
+        promotions (List[Promotion]): The promotions.
+        components (List[List[int]]): The SKU ids of every component.
+        component_of (Dict[int, int]): A dictionary mapping SKU ids to their component.
+        max_states (int): The search budget for components of overlapping promotions.
+        max_children (int): The number of applications of each promotion expanded from
+            every state.
+        optimal (bool): Whether the last adjustment is proven optimal, False when the
+            search ran out of max_states.
+    """
+    def __init__(self, catalog: Catalog, promotions: Iterable[Promotion], max_states: int = 10000,
+                 max_children: int = 16):
+        """Compile the promotions against a catalog.
+
+        Args:
+            catalog (Catalog): The catalog the promotions are priced against.
+            promotions (Iterable[Promotion]): The promotions.
+            max_states (int, optional): The search budget for components of
+                overlapping promotions. Defaults to 10000.
+            max_children (int, optional): The number of applications of each promotion
+                expanded from every state of the search. Defaults to 16.
+        """
+        self.catalog = catalog
+        self.promotions: List[Promotion] = list(promotions)
+        self.max_states = max_states
+        self.max_children = max_children
+        self.optimal = True
+        parents: Dict[int, int] = {}
+
+        def find(sku_id: int) -> int:
+            while parents[sku_id] != sku_id:
+                parents[sku_id] = parents[parents[sku_id]]
+                sku_id = parents[sku_id]
+            return sku_id
+
+        for promotion in self.promotions:
+            for sku in promotion.skus:
+                if sku not in catalog:
+                    raise ValueError(f"Unknown SKU in promotion: {sku}")
+                parents.setdefault(catalog.sku_ids[sku], catalog.sku_ids[sku])
+            first = find(catalog.sku_ids[promotion.skus[0]])
+            for sku in promotion.skus[1:]:
+                parents[find(catalog.sku_ids[sku])] = first
+        roots: Dict[int, int] = {}
+        self.components: List[List[int]] = []
+        self.component_of: Dict[int, int] = {}
+        for sku_id in sorted(parents):
+            component = roots.setdefault(find(sku_id), len(roots))
+            if component == len(self.components):
+                self.components.append([])
+            self.components[component].append(sku_id)
+            self.component_of[sku_id] = component
+        self._members: List[List[Tuple[Promotion, Tuple[int, ...]]]] = [[] for _ in self.components]
+        for promotion in self.promotions:
+            component = self.component_of[catalog.sku_ids[promotion.skus[0]]]
+            local = {sku_id: i for i, sku_id in enumerate(self.components[component])}
+            positions = tuple(local[catalog.sku_ids[sku]] for sku in promotion.skus)
+            self._members[component].append((promotion, positions))
+
+    def adjustment(self, component: int, quantities: Dict[int, float], cents: bool = False,
+                   rules: Optional[Sequence[Rule]] = None) -> float:
+        """Calculate how much the promotions of a component take off the regular price.
+
+        Args:
+            component (int): The component to price.
+            quantities (Dict[int, float]): The scanned quantity of every SKU id in the basket.
+            cents (bool, optional): Whether to price in integer cents. Defaults to False.
+            rules (Optional[Sequence[Rule]], optional): The rule of every SKU id, e.g. of a
+                newer version of the catalog. Defaults to the rules of the catalog.
+
+        Returns:
+            float: The change of the total, zero or negative; an int in cents mode.
+        """
+        sku_ids = self.components[component]
+        scanned = [float(quantities.get(sku_id, 0)) for sku_id in sku_ids]
+        units = tuple(int(quantity) for quantity in scanned)
+        self.optimal = True
+        if not any(units):
+            return 0
+        start = perf_counter() if instrumentation.enabled else None
+        rules = self.catalog.rules if rules is None else rules
+        prices: Dict[Tuple[int, int], float] = {}
+
+        def price_of(position: int, consumed: int) -> float:
+            key = (position, consumed)
+            price = prices.get(key)
+            if price is None:
+                quantity = scanned[position] - consumed
+                if quantity.is_integer():
+                    quantity = int(quantity)
+                rule = rules[sku_ids[position]]
+                price = rule.calculate_price_cents(quantity) if cents else rule.calculate_price(quantity)
+                prices[key] = price
+            return price
+
+        regular = sum(price_of(position, 0) for position in range(len(sku_ids)))
+        members = self._members[component]
+        if len(members) == 1:
+            promotion, positions = members[0]
+            if isinstance(promotion, BundlePromotion):
+                best = self._solve_bundle(promotion, positions, units, price_of, cents)
+            else:
+                best = self._solve_group(promotion, positions, units, price_of, cents)
+        else:
+            best = self._search(members, units, price_of, cents)
+        if start is not None:
+            instrumentation.record("promotion.solve", perf_counter() - start)
+        return min(best - regular, 0)
+
+    @staticmethod
+    def _solve_bundle(promotion: BundlePromotion, positions: Tuple[int, ...], units: Tuple[int, ...],
+                      price_of: Callable[[int, int], float], cents: bool) -> float:
+        """Price the promotion SKUs for every number of bundles and keep the cheapest.
+
+        Returns:
+            float: The lowest price of the promotion SKUs.
+        """
+        bundle_price = promotion.price_cents if cents else promotion.price
+        limit = min(units[position] // need for position, need in zip(positions, promotion.quantities) if need)
+        return min(applications * bundle_price +
+                   sum(price_of(position, applications * need)
+                       for position, need in zip(positions, promotion.quantities))
+                   for applications in range(limit + 1))
+
+    @staticmethod
+    def _solve_group(promotion: MixAndMatchPromotion, positions: Tuple[int, ...], units: Tuple[int, ...],
+                     price_of: Callable[[int, int], float], cents: bool) -> float:
+        """Find the cheapest price of the group SKUs after consuming each number of units.
+
+        cheapest[t] is the lowest regular price of what is left of the group when
+        t of its units go into applications, built one SKU at a time by a
+        min-plus convolution, so the best number of applications is a 1-D scan.
+
+        Returns:
+            float: The lowest price of the group SKUs.
+        """
+        cheapest = [0]
+        for position in positions:
+            residual = [price_of(position, consumed) for consumed in range(units[position] + 1)]
+            merged = [None] * (len(cheapest) + len(residual) - 1)
+            for taken, price in enumerate(cheapest):
+                for consumed, rest in enumerate(residual):
+                    candidate = price + rest
+                    current = merged[taken + consumed]
+                    if current is None or candidate < current:
+                        merged[taken + consumed] = candidate
+            cheapest = merged
+        group_price = promotion.price_cents if cents else promotion.price
+        return min(applications * group_price + cheapest[applications * promotion.quantity]
+                   for applications in range(len(cheapest) // promotion.quantity + 1)
+                   if applications * promotion.quantity < len(cheapest))
+
+    def _search(self, members: List[Tuple[Promotion, Tuple[int, ...]]], units: Tuple[int, ...],
+                price_of: Callable[[int, int], float], cents: bool) -> float:
+        """Search the allocations of overlapping promotions by their consumed units.
+
+        The children of a state are explored in order of the saving of their
+        application, so the first allocations found are already good. Only newly
+        expanded states count towards max_states. Past the budget, children that
+        were not expanded yet are skipped, optimal is set to False and the
+        "promotion.search.cut_short" counter is incremented.
+
+        Returns:
+            float: The lowest price of the component found within the budget.
+        """
+        def residual(consumed: Tuple[int, ...]) -> float:
+            return sum(price_of(position, used) for position, used in enumerate(consumed))
+
+        def children(consumed: Tuple[int, ...]) -> Iterator[Tuple[Tuple[int, ...], float]]:
+            found = []
+            for promotion, positions in members:
+                price = promotion.price_cents if cents else promotion.price
+                available = tuple(units[position] - consumed[position] for position in positions)
+                saving = [price_of(position, consumed[position]) - price_of(position, consumed[position] + 1)
+                          if units[position] > consumed[position] else 0 for position in positions]
+                order = sorted(range(len(positions)), key=lambda index: -saving[index])
+                for used in islice(promotion.consumptions(available, order), self.max_children):
+                    child = list(consumed)
+                    for position, need in zip(positions, used):
+                        child[position] += need
+                    gain = sum(price_of(position, consumed[position]) - price_of(position, child[position])
+                               for position in positions) - price
+                    found.append((-gain, len(found), tuple(child), price))
+            found.sort()
+            return iter([(child, price) for _, _, child, price in found])
+
+        best: Dict[Tuple[int, ...], float] = {}
+        root = (0,) * len(units)
+        stack = [[root, children(root), residual(root), 0]]
+        spent = 0
+        cut_short = False
+        while stack:
+            frame = stack[-1]
+            for child, edge in frame[1]:
+                known = best.get(child)
+                if known is not None:
+                    frame[2] = min(frame[2], edge + known)
+                elif spent < self.max_states:
+                    spent += 1
+                    stack.append([child, children(child), residual(child), edge])
+                    break
+                else:
+                    cut_short = True
+            else:
+                stack.pop()
+                best[frame[0]] = frame[2]
+                if stack:
+                    stack[-1][2] = min(stack[-1][2], frame[3] + frame[2])
+        if cut_short:
+            self.optimal = False
+            if instrumentation.enabled:
+                instrumentation.count("promotion.search.cut_short")
+        return best[root]
@@ -0,0 +1,111 @@
+from typing import Dict, List
+
+class ReceiptLine:
+    """The pricing breakdown of one scanned SKU.
+
+    Amounts are floats in float money mode and integer cents in cents money mode.
+
+    Attributes:
+        sku (str): The identifier of the item.
+        quantity (float): The scanned quantity, an int when it is integral.
+        strategy (str): The name of the pricing strategy applied.
+        price (float): The price charged for the quantity.
+        regular_price (float): The price of the quantity under regular pricing.
+        savings (float): The regular price minus the price charged.
+        sets (int): The number of promotional sets formed.
+        free_units (int): The number of units given away.
+    """
+    __slots__ = ("sku", "quantity", "strategy", "price", "regular_price", "savings", "sets", "free_units")
+
+    def __init__(self, sku: str, quantity: float, strategy: str, price: float, regular_price: float,
+                 sets: int, free_units: int):
+        """Initialize the line, deriving its savings.
+
+        Args:
+            sku (str): The identifier of the item.
+            quantity (float): The scanned quantity.
+            strategy (str): The name of the pricing strategy applied.
+            price (float): The price charged for the quantity.
+            regular_price (float): The price of the quantity under regular pricing.
+            sets (int): The number of promotional sets formed.
+            free_units (int): The number of units given away.
+        """
+        self.sku = sku
+        self.quantity = quantity
+        self.strategy = strategy
+        self.price = price
+        self.regular_price = regular_price
+        self.savings = regular_price - price if type(price) == int else round(regular_price - price, 2)
+        self.sets = sets
+        self.free_units = free_units
+
+    def as_dict(self) -> Dict[str, object]:
+        """Convert the line to a dictionary, e.g. for an audit log.
+
+        Returns:
+            Dict[str, object]: The attributes of the line.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Receipt:
+    """The line-item breakdown of a checkout.
+
+    Attributes:
+        lines (List[ReceiptLine]): The line of every scanned SKU.
+        promotion_savings (float): The amount taken off by cross-SKU promotions.
+        total (float): The total price, equal to the checkout total.
+        money_mode (str): "float" or "cents", the unit of every amount.
+    """
+    __slots__ = ("lines", "promotion_savings", "total", "money_mode")
+
+    def __init__(self, lines: List[ReceiptLine], promotion_savings: float, total: float, money_mode: str):
+        """Initialize the receipt.
+
+        Args:
+            lines (List[ReceiptLine]): The line of every scanned SKU.
+            promotion_savings (float): The amount taken off by cross-SKU promotions.
+            total (float): The total price.
+            money_mode (str): "float" or "cents", the unit of every amount.
+        """
+        self.lines = lines
+        self.promotion_savings = promotion_savings
+        self.total = total
+        self.money_mode = money_mode
+
+    @property
+    def savings(self) -> float:
+        """The total savings of the lines and the promotions."""
+        savings = sum(line.savings for line in self.lines) + self.promotion_savings
+        return savings if self.money_mode == "cents" else round(savings, 2)
+
+    def as_dict(self) -> Dict[str, object]:
+        """Convert the receipt to a dictionary, e.g. for an audit log.
+
+        Returns:
+            Dict[str, object]: The lines, savings and total of the receipt.
+        """
+        return {"lines": [line.as_dict() for line in self.lines],
+                "promotion_savings": self.promotion_savings,
+                "savings": self.savings,
+                "total": self.total,
+                "money_mode": self.money_mode}
+
+    def format(self) -> str:
+        """Render the receipt as text for a receipt printer.
+
+        Returns:
+            str: One row per line followed by the savings and the total.
+        """
+        scale = 100 if self.money_mode == "cents" else 1
+        rows = []
+        for line in self.lines:
+            row = f"{line.sku:<12}{line.quantity:>8} {line.strategy:<24}{line.price / scale:>10.2f}"
+            if line.savings:
+                row += f"  (saved {line.savings / scale:.2f})"
+            rows.append(row)
+        if self.promotion_savings:
+            rows.append(f"{'Promotions':<45}{-self.promotion_savings / scale:>10.2f}")
+        rows.append(f"{'Savings':<45}{self.savings / scale:>10.2f}")
+        rows.append(f"{'Total':<45}{self.total / scale:>10.2f}")
+        return "\n".join(rows)
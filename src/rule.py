@@ -1,20 +1,61 @@
-from src.strategy import PricingStrategy
+from bisect import bisect_right
+from time import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+from src.cache import PriceCache
+from src.strategy import CombinedPricing, PricingStrategy
 
 class Rule:
     """A class representing a pricing rule that applies a specific pricing strategy.
     
     Attributes:
         strategy (PricingStrategy): The pricing strategy to be used for calculations.
+        cache (Optional[PriceCache]): The cache of calculated prices, if enabled.
     """
+    __slots__ = ("strategy", "cache")
     
     def __init__(self,
-                 strategy: PricingStrategy):
+                 strategy: Union[PricingStrategy, Sequence[PricingStrategy]],
+                 cache_size: int = 0,
+                 policy: str = "best_of",
+                 groups: Optional[Sequence[Sequence[int]]] = None):
         """Initialize a new Rule instance.
         
         Args:
-            strategy (PricingStrategy): The pricing strategy to be used for calculations.
+            strategy (Union[PricingStrategy, Sequence[PricingStrategy]]): The pricing strategy
+                to be used for calculations, or several strategies to combine.
+            cache_size (int, optional): The number of prices to keep in an LRU cache shared
+                by every checkout using this rule. Defaults to 0 (no cache).
+            policy (str, optional): How several strategies combine: "best_of", "stack" or
+                "exclusive". Defaults to "best_of".
+            groups (Optional[Sequence[Sequence[int]]], optional): The indices of the strategies
+                in every exclusive group, for the "exclusive" policy. Defaults to None.
         """
+        if not isinstance(strategy, PricingStrategy):
+            strategy = CombinedPricing(strategy, policy, groups)
         self.strategy = strategy
+        self.cache: Optional[PriceCache] = PriceCache(cache_size) if cache_size else None
+
+    def _cached(self, item_quantity: int, cents: bool) -> float:
+        """Look a price up in the cache, calculating and storing it on a miss.
+        
+        The cache is keyed by the strategy and its revision, so changing the
+        strategy or updating its parameters drops the stale prices.
+        
+        Args:
+            item_quantity (int): The number of items to calculate the price for.
+            cents (bool): Whether to price in integer cents.
+            
+        Returns:
+            float: The total price, in integer cents if requested.
+        """
+        strategy = self.strategy
+        owner = (strategy, strategy.revision())
+        key = (item_quantity, cents)
+        price = self.cache.get(key, owner)
+        if price is None:
+            price = strategy.calculate_price_cents(item_quantity) if cents else strategy.calculate_price(item_quantity)
+            self.cache.put(key, price, owner)
+        return price
         
     def calculate_price(self, item_quantity: int) -> float:
         """Calculate the total price for a given quantity of items.
@@ -25,4 +66,95 @@ class Rule:
         Returns:
             float: The total price calculated using the strategy.
         """
-        return self.strategy.calculate_price(item_quantity)
+        if self.cache is None:
+            return self.strategy.calculate_price(item_quantity)
+        return self._cached(item_quantity, False)
+
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate the exact total price in cents for a given quantity of items.
+        
+        Args:
+            item_quantity (int): The number of items to calculate the price for.
+            
+        Returns:
+            int: The total price in cents calculated using the strategy.
+        """
+        if self.cache is None:
+            return self.strategy.calculate_price_cents(item_quantity)
+        return self._cached(item_quantity, True)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate the total price for each quantity in a batch.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for.
+            
+        Returns:
+            List[float]: The total price of each quantity calculated using the strategy.
+        """
+        return self.strategy.calculate_prices(quantities)
+
+class ScheduledRule(Rule):
+    """A pricing rule whose strategy follows a schedule of validity windows.
+    
+    The windows are compiled once into sorted boundaries and the strategy active
+    between each pair of them, so resolving the active strategy is a binary search
+    over the boundaries and switching promotions needs no rebuild of the rules.
+    
+    Attributes:
+        default (PricingStrategy): The strategy used outside of every window.
+        clock (Callable[[], float]): The function returning the current time.
+        boundaries (List[float]): The sorted start and end times of the windows.
+        strategies (List[PricingStrategy]): The strategy active before each boundary,
+            followed by the one active after the last boundary.
+    """
+    __slots__ = ("default", "clock", "boundaries", "strategies")
+
+    def __init__(self,
+                 default: PricingStrategy,
+                 schedule: Iterable[Tuple[float, float, PricingStrategy]],
+                 clock: Callable[[], float] = time,
+                 cache_size: int = 0):
+        """Initialize a new ScheduledRule instance.
+        
+        Args:
+            default (PricingStrategy): The strategy used outside of every window.
+            schedule (Iterable[Tuple[float, float, PricingStrategy]]): The windows as
+                (start, end, strategy), each active from start up to but excluding end.
+            clock (Callable[[], float], optional): The function returning the current
+                time, comparable with the window bounds. Defaults to time.time.
+            cache_size (int, optional): The number of prices to keep in an LRU cache.
+                Defaults to 0 (no cache).
+        """
+        self.clock = clock
+        self.boundaries = []
+        self.strategies = []
+        for start, end, strategy in sorted(schedule, key=lambda window: window[0]):
+            if not start < end:
+                raise ValueError("Window must start before it ends")
+            if self.boundaries and start < self.boundaries[-1]:
+                raise ValueError("Windows cannot overlap")
+            if not self.boundaries or start > self.boundaries[-1]:
+                self.boundaries.append(start)
+                self.strategies.append(None)
+            self.boundaries.append(end)
+            self.strategies.append(strategy)
+        self.strategies.append(None)
+        super().__init__(default, cache_size)
+
+    @property
+    def strategy(self) -> PricingStrategy:
+        """The strategy active at the current time of the clock."""
+        return self.strategies[self.active_window()] or self.default
+
+    @strategy.setter
+    def strategy(self, strategy: PricingStrategy):
+        self.default = strategy
+
+    def active_window(self) -> int:
+        """Find the window containing the current time of the clock.
+        
+        Returns:
+            int: The index of the active strategy in strategies.
+        """
+        return bisect_right(self.boundaries, self.clock())
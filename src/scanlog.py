@@ -0,0 +1,99 @@
+"""Streaming parser for lane scan logs.
+
+A scan log is a sequence of single-character items, each scanned once, and
+weighted items written as ``|<item><quantity>|``, e.g. ``AA|F2.5|AA``.
+Whitespace between tokens is ignored, so logs may be split over lines.
+
+The parser consumes the log as an iterable of chunks (str or bytes) in one
+linear pass and never holds more than one chunk plus an unfinished weighted
+token of at most MAX_RECORD characters, so arbitrarily large journals replay in
+constant memory::
+
+    with open("lane-1.log", "rb") as log:
+        replay(checkout, read_chunks(log))
+"""
+import codecs
+from typing import BinaryIO, Iterable, Iterator, TextIO, Tuple, Union
+from src.checkout import Checkout
+
+# The longest weighted token, bars included, e.g. "|F2.5|" is 6 characters.
+MAX_RECORD = 64
+
+def parse_scan_log(chunks: Iterable[Union[str, bytes]],
+                   max_record: int = MAX_RECORD) -> Iterator[Tuple[str, float]]:
+    """Tokenize a scan log into (item, quantity) pairs.
+    
+    Args:
+        chunks (Iterable[Union[str, bytes]]): The log in chunks of any size, e.g. read
+            from a file or received from a socket. Bytes are decoded as UTF-8.
+        max_record (int, optional): The longest weighted token accepted, bars included.
+            A longer one, e.g. a "|" that is never closed, is a parse error instead of
+            being buffered. Defaults to MAX_RECORD.
+            
+    Yields:
+        Tuple[str, float]: The item and the quantity of every scan, 1 for unweighted items.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if pending:
+            chunk = pending + chunk
+            pending = ""
+        position, length = 0, len(chunk)
+        while position < length:
+            char = chunk[position]
+            if char == "|":
+                end = chunk.find("|", position + 1, position + max_record)
+                if end < 0:
+                    if length - position >= max_record:
+                        raise ValueError(f"Weighted item longer than {max_record} characters: "
+                                         f"{chunk[position:position + 16]!r}...")
+                    pending = chunk[position:]
+                    break
+                if end - position < 3:
+                    raise ValueError(f"Invalid weighted item: {chunk[position:end + 1]!r}")
+                yield chunk[position + 1], float(chunk[position + 2:end])
+                position = end + 1
+            else:
+                if not char.isspace():
+                    yield char, 1
+                position += 1
+    if pending or decoder.decode(b"", final=True):
+        raise ValueError(f"Unterminated weighted item: {pending!r}")
+
+
+def read_chunks(file: Union[BinaryIO, TextIO], chunk_size: int = 1 << 16) -> Iterator[Union[str, bytes]]:
+    """Read a file in fixed-size chunks.
+    
+    Args:
+        file (Union[BinaryIO, TextIO]): The file to read.
+        chunk_size (int, optional): The size of every chunk. Defaults to 64 KiB.
+        
+    Yields:
+        Union[str, bytes]: The chunks of the file.
+    """
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def replay(checkout: Checkout, chunks: Iterable[Union[str, bytes]]) -> int:
+    """Scan every item of a scan log into a checkout.
+    
+    Args:
+        checkout (Checkout): The checkout to scan the items into.
+        chunks (Iterable[Union[str, bytes]]): The scan log in chunks.
+        
+    Returns:
+        int: The number of scans replayed.
+    """
+    scans = 0
+    scan = checkout.scan
+    for item, quantity in parse_scan_log(chunks):
+        scan(item, quantity)
+        scans += 1
+    return scans
@@ -0,0 +1,148 @@
+"""An asyncio checkout server speaking JSON lines over TCP or Unix sockets.
+
+Every connection owns one basket. Each request is one JSON object per line,
+and every request gets one JSON reply line:
+
+    {"op": "open"}                              -> {"ok": true}
+    {"op": "scan", "item": "A", "quantity": 1}  -> {"ok": true}
+    {"op": "total"}                             -> {"ok": true, "total": 1.1}
+    {"op": "close"}                             -> {"ok": true, "total": 1.1}
+
+Errors are reported as {"ok": false, "error": "..."} and keep the connection open.
+"""
+import argparse
+import asyncio
+import json
+from typing import Dict, Optional, Union
+from src.catalog import Catalog
+from src.checkout import Checkout
+from src.loader import load
+from src.rule import Rule
+from src.strategy import (RegularPricing,
+                          DiscountPricing,
+                          NDiscountMPricing,
+                          BuyNGetMFreePricing,
+                          NForMPricing,
+                          WeightPricing)
+
+class CheckoutServer:
+    """A scanning server mapping every connection to a Checkout.
+    
+    Attributes:
+        catalog (Catalog): The compiled catalog of pricing rules shared by all connections.
+        money_mode (str): The money mode of every basket, "float" or "cents".
+    """
+    
+    def __init__(self, rules: Union[Dict[str, Rule], Catalog], money_mode: str = "float"):
+        """Initialize the server with pricing rules.
+        
+        Args:
+            rules (Union[Dict[str, Rule], Catalog]): A dictionary of pricing rules for different
+                items, or a compiled catalog.
+            money_mode (str, optional): The money mode of every basket. Defaults to "float".
+        """
+        self.catalog = rules if isinstance(rules, Catalog) else Catalog(rules)
+        self.money_mode = money_mode
+
+    def handle(self, checkout: Optional[Checkout], request: dict):
+        """Apply one request to the basket of a connection.
+        
+        Args:
+            checkout (Optional[Checkout]): The open basket of the connection, if any.
+            request (dict): The decoded request.
+            
+        Returns:
+            Tuple[Optional[Checkout], dict]: The basket after the request and the reply.
+        """
+        op = request.get("op")
+        if op == "open":
+            return Checkout(self.catalog, self.money_mode), {"ok": True}
+        if checkout is None:
+            return None, {"ok": False, "error": "No open basket"}
+        if op == "scan":
+            item = request.get("item")
+            if item not in self.catalog:
+                return checkout, {"ok": False, "error": f"Unknown item: {item}"}
+            checkout.scan(item, request.get("quantity", 1))
+            return checkout, {"ok": True}
+        if op == "total":
+            return checkout, {"ok": True, "total": checkout.calculate_total_price()}
+        if op == "close":
+            return None, {"ok": True, "total": checkout.calculate_total_price()}
+        return checkout, {"ok": False, "error": f"Unknown op: {op}"}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        checkout = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    checkout, reply = self.handle(checkout, request)
+                except (ValueError, TypeError, AttributeError) as error:
+                    reply = {"ok": False, "error": str(error)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Start listening on a TCP socket.
+        
+        Args:
+            host (str, optional): The host to bind. Defaults to "127.0.0.1".
+            port (int, optional): The port to bind, 0 for any free port. Defaults to 0.
+            
+        Returns:
+            asyncio.AbstractServer: The running server.
+        """
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """Start listening on a Unix socket.
+        
+        Args:
+            path (str): The path of the socket.
+            
+        Returns:
+            asyncio.AbstractServer: The running server.
+        """
+        return await asyncio.start_unix_server(self._serve_connection, path)
+
+
+def example_rules() -> Dict[str, Rule]:
+    """The example pricing rules from the README."""
+    return {
+        "A": Rule(RegularPricing(1.1)),
+        "B": Rule(DiscountPricing(2, 20)),
+        "C": Rule(NDiscountMPricing(4, 3, 20)),
+        "D": Rule(BuyNGetMFreePricing(3, 2, 1)),
+        "E": Rule(NForMPricing(1, 3, 1)),
+        "F": Rule(WeightPricing(2, 1)),
+    }
+
+
+async def serve(server: CheckoutServer, host: str, port: int, unix: Optional[str]) -> None:
+    listener = await (server.start_unix(unix) if unix else server.start(host, port))
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the checkout server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--money-mode", default="float", choices=["float", "cents"])
+    parser.add_argument("--catalog", help="CSV or JSON catalog file, snapshotted next to it (default: example rules)")
+    args = parser.parse_args(argv)
+    rules = load(args.catalog) if args.catalog else example_rules()
+    asyncio.run(serve(CheckoutServer(rules, args.money_mode), args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
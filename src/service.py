@@ -0,0 +1,88 @@
+import threading
+from typing import Dict, Hashable, Union
+from src.catalog import Catalog, VersionedCatalog
+from src.checkout import Checkout
+from src.rule import Rule
+
+class CheckoutService:
+    """A thread-safe manager of many open checkouts sharing one rule catalog.
+    
+    Every basket is guarded by one of a fixed number of lock stripes chosen by
+    the hash of its id, so scans on different lanes rarely contend and no global
+    lock serializes the tills.
+    
+    Attributes:
+        catalog (Union[Catalog, VersionedCatalog]): The compiled catalog of pricing rules shared
+            by all baskets. Baskets opened on a versioned catalog pin its current version.
+        money_mode (str): The money mode of every basket, "float" or "cents".
+    """
+    
+    def __init__(self, rules: Union[Dict[str, Rule], Catalog, VersionedCatalog], stripes: int = 64,
+                 money_mode: str = "float"):
+        """Initialize the service with pricing rules.
+        
+        Args:
+            rules (Union[Dict[str, Rule], Catalog, VersionedCatalog]): A dictionary of pricing
+                rules for different items, a compiled catalog, or a versioned catalog.
+            stripes (int, optional): The number of lock stripes. Defaults to 64.
+            money_mode (str, optional): The money mode of every basket. Defaults to "float".
+        """
+        if stripes < 1:
+            raise ValueError("Stripes must be positive")
+        self.catalog = rules if isinstance(rules, (Catalog, VersionedCatalog)) else Catalog(rules)
+        self.money_mode = money_mode
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._baskets: Dict[Hashable, Checkout] = {}
+
+    def _lock(self, basket_id: Hashable) -> threading.Lock:
+        return self._locks[hash(basket_id) % len(self._locks)]
+
+    def open(self, basket_id: Hashable) -> None:
+        """Open a new empty basket.
+        
+        Args:
+            basket_id (Hashable): The identifier of the basket.
+        """
+        checkout = Checkout(self.catalog, self.money_mode)
+        with self._lock(basket_id):
+            if basket_id in self._baskets:
+                raise ValueError(f"Basket already open: {basket_id}")
+            self._baskets[basket_id] = checkout
+
+    def scan(self, basket_id: Hashable, item: str, quantity: float = 1) -> None:
+        """Scan an item into an open basket.
+        
+        Args:
+            basket_id (Hashable): The identifier of the basket.
+            item (str): The identifier of the item being scanned.
+            quantity (float, optional): The quantity of the item. Defaults to 1.
+        """
+        with self._lock(basket_id):
+            self._baskets[basket_id].scan(item, quantity)
+
+    def total(self, basket_id: Hashable) -> float:
+        """Calculate the total price of an open basket.
+        
+        Args:
+            basket_id (Hashable): The identifier of the basket.
+            
+        Returns:
+            float: The total price of the basket.
+        """
+        with self._lock(basket_id):
+            return self._baskets[basket_id].calculate_total_price()
+
+    def close(self, basket_id: Hashable) -> float:
+        """Close a basket and return its final total price.
+        
+        Args:
+            basket_id (Hashable): The identifier of the basket.
+            
+        Returns:
+            float: The total price of the basket.
+        """
+        with self._lock(basket_id):
+            return self._baskets.pop(basket_id).calculate_total_price()
+
+    def __len__(self) -> int:
+        return len(self._baskets)
@@ -1,14 +1,43 @@
+from bisect import bisect_right
+from inspect import signature
+from itertools import count
+from typing import Hashable, Iterable, List, Optional, Tuple
 from src.utils import (check_price,
                        check_quantity,
                        check_discount,
-                       check_weight)
+                       check_weight,
+                       to_cents,
+                       multiply_cents)
+
+# Every new strategy and every update draws the next version, so a version is
+# never reused, even by a strategy replacing another one.
+_versions = count(1)
+
+def _integer_array(quantities: Iterable[int]) -> bool:
+    """Check whether quantities are a NumPy array of integers, which the strategies
+    price with array arithmetic on integer cents after widening them to int64, as
+    narrower dtypes overflow when multiplied by a price in cents."""
+    dtype = getattr(quantities, "dtype", None)
+    return dtype is not None and dtype.kind in "iu"
+
 
 class PricingStrategy():
     """Base class for all pricing strategies.
     
     This abstract class defines the interface for all pricing strategies.
     Each concrete strategy must implement the calculate_price method.
+    
+    The parameters of a strategy are changed through update, which gives it a
+    new version so that caches of its prices notice the change. Versions come
+    from one counter shared by all strategies and are never reused.
+    
+    Prices are rounded half up to whole cents, so the float results agree with
+    the cents ones. This differs from the original float arithmetic, where
+    round() sent 1.005 to 1.0, the N-for-M set price was not rounded at all and
+    N-discount-M lines below the threshold kept float noise, e.g. 1.0499999999999998.
     """
+    __slots__ = ("price", "price_cents", "version")
+
     def __init__(self, price: float):
         """Initialize the pricing strategy with a base price.
         
@@ -16,7 +45,40 @@ class PricingStrategy():
             price (float): The base price of the item
         """
         check_price(price)
-        self.price = round(price, 2)
+        self.price_cents = to_cents(price)
+        self.price = self.price_cents / 100
+        self.version = next(_versions)
+
+    def update(self, **parameters) -> None:
+        """Change parameters of the strategy and give it a new version.
+        
+        The strategy is rebuilt from its parameters, so the new values are
+        validated and every derived value, e.g. price_cents, is recomputed.
+        Reassigning an attribute directly skips both and leaves cached prices stale.
+        
+        Args:
+            **parameters: The new value of each parameter to change, by its
+                constructor argument name
+        """
+        names = [name for name in signature(type(self).__init__).parameters if name != "self"]
+        unknown = set(parameters).difference(names)
+        if unknown:
+            raise TypeError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        arguments = {name: getattr(self, name) for name in names}
+        arguments.update(parameters)
+        rebuilt = type(self)(**arguments)
+        for klass in type(self).__mro__:
+            for name in getattr(klass, "__slots__", ()):
+                setattr(self, name, getattr(rebuilt, name))
+        self.version = next(_versions)
+
+    def revision(self) -> Hashable:
+        """Return a token that changes whenever the prices of the strategy may change.
+        
+        Returns:
+            Hashable: The version of the strategy
+        """
+        return self.version
 
     def calculate_price(self, item_quantity: int) -> float:
         """Calculate the total price for a given quantity of items.
@@ -29,10 +91,76 @@ class PricingStrategy():
         """
         pass
 
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate the total price for a given quantity of items in integer cents.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        pass
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate the total price for each quantity in a batch.
+        
+        The strategies price integer quantities in integer cents and divide by 100
+        once, which gives the same floats as calculate_price without its round()
+        calls: 2-10x faster than calling it per quantity on lists and ranges. Other
+        quantities fall back to calculate_price. A NumPy array of integers is priced
+        with array arithmetic instead and gives a NumPy array back.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for,
+                e.g. a list, a range or a NumPy array
+            
+        Returns:
+            List[float]: The total price of each quantity, same as calculate_price
+        """
+        return [self.calculate_price(quantity) for quantity in quantities]
+
+    def calculate_regular_price(self, item_quantity: int, cents: bool = False) -> float:
+        """Calculate the price a quantity would have under regular pricing.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            cents (bool, optional): Whether to return integer cents. Defaults to False.
+            
+        Returns:
+            float: The regular total price, in integer cents if requested
+        """
+        if cents:
+            return multiply_cents(self.price_cents, item_quantity)
+        return round(self.price * item_quantity, 2)
+
+    def applied_sets(self, item_quantity: int) -> Tuple[int, int]:
+        """Count the promotional sets formed by a quantity and the units given away.
+        
+        Args:
+            item_quantity (int): The number of items
+            
+        Returns:
+            Tuple[int, int]: The number of sets formed and the number of free units
+        """
+        return 0, 0
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe where the price starts growing periodically with the quantity.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (start, length) such that adding length units to
+                any quantity of at least start always adds the same price, or None if
+                the price has no such period
+        """
+        return None
+
 
 class RegularPricing(PricingStrategy):
     """Regular pricing strategy that applies no special rule.
     """
+    __slots__ = ()
+
     def __init__(self, price: float):
         """Initialize regular pricing with base price.
         
@@ -53,11 +181,48 @@ class RegularPricing(PricingStrategy):
         total_price = self.price * item_quantity
         return round(total_price, 2)
 
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents by multiplying base price with quantity.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        return multiply_cents(self.price_cents, item_quantity)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate total prices for a batch of quantities at the base price.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        cents = self.price_cents
+        if _integer_array(quantities):
+            quantities = quantities.astype("int64")
+            return quantities * cents / 100
+        return [cents * quantity / 100 if type(quantity) == int else self.calculate_price(quantity)
+                for quantity in quantities]
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as growing by the same amount with every unit.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (0, 1)
+        """
+        return 0, 1
+
 
 class DiscountPricing(PricingStrategy):
     """Pricing strategy that applies a percentage discount to all items.
     Exampel: 10% discount for A
     """
+    __slots__ = ("discount",)
+
     def __init__(self, price: float, discount: int):
         """Initialize discount pricing with base price and discount percentage.
         
@@ -82,10 +247,48 @@ class DiscountPricing(PricingStrategy):
         total_price = discounted_price * item_quantity
         return round(total_price, 2)
 
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with discount applied to all items.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        discounted_cents = multiply_cents(self.price_cents, 100 - self.discount, 100)
+        return multiply_cents(discounted_cents, item_quantity)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate discounted total prices for a batch of quantities.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        cents = round(round(self.price * (100 - self.discount)/100.0, 2) * 100)
+        if _integer_array(quantities):
+            quantities = quantities.astype("int64")
+            return quantities * cents / 100
+        return [cents * quantity / 100 if type(quantity) == int else self.calculate_price(quantity)
+                for quantity in quantities]
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as growing by the same amount with every unit.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (0, 1)
+        """
+        return 0, 1
+
 
 class NDiscountMPricing(PricingStrategy):
     """Pricing strategy that applies a discount when buying N or more items.
     """
+    __slots__ = ("buy_quantity", "discount")
+
     def __init__(self, price: float, buy_quantity: int, discount: int):
         """Initialize N-for-discount pricing with base price, quantity threshold and discount.
         
@@ -110,16 +313,68 @@ class NDiscountMPricing(PricingStrategy):
             float: The total price rounded to 2 decimal places
         """
         if item_quantity < self.buy_quantity:
-            return self.price * item_quantity
+            return round(self.price * item_quantity, 2)
         else:
             discounted_price = round(self.price * (100 - self.discount)/100.0, 2)
             total_price = discounted_price * item_quantity
             return round(total_price, 2)
+
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with discount applied if quantity threshold is met.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        if item_quantity < self.buy_quantity:
+            return multiply_cents(self.price_cents, item_quantity)
+        discounted_cents = multiply_cents(self.price_cents, 100 - self.discount, 100)
+        return multiply_cents(discounted_cents, item_quantity)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate total prices for a batch of quantities, discounting those over the threshold.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        cents, buy_quantity = self.price_cents, self.buy_quantity
+        discounted_cents = round(round(self.price * (100 - self.discount)/100.0, 2) * 100)
+        if _integer_array(quantities):
+            quantities = quantities.astype("int64")
+            return quantities * ((quantities < buy_quantity) * (cents - discounted_cents) + discounted_cents) / 100
+        return [(cents if quantity < buy_quantity else discounted_cents) * quantity / 100 if type(quantity) == int
+                else self.calculate_price(quantity) for quantity in quantities]
+
+    def applied_sets(self, item_quantity: int) -> Tuple[int, int]:
+        """Count the discounted sets formed by a quantity.
+        
+        Args:
+            item_quantity (int): The number of items
+            
+        Returns:
+            Tuple[int, int]: 1 once the discount applies to all items, else 0, and no free units
+        """
+        return int(item_quantity >= self.buy_quantity), 0
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as growing by the same amount with every unit once discounted.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (buy_quantity, 1)
+        """
+        return self.buy_quantity, 1
         
         
 class BuyNGetMFreePricing(PricingStrategy):
     """Pricing strategy that offers M free items when buying N items.
     """
+    __slots__ = ("buy_quantity", "free_quantity")
+
     def __init__(self, price: float, buy_quantity: int, free_quantity: int):
         """Initialize Buy-N-Get-M-Free pricing with base price and quantities.
         
@@ -149,10 +404,72 @@ class BuyNGetMFreePricing(PricingStrategy):
         total_price += self.price * min(remaining_items, self.buy_quantity)
         return round(total_price, 2)
 
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with free items applied.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        complete_sets = item_quantity // (self.buy_quantity + self.free_quantity)
+        remaining_items = item_quantity % (self.buy_quantity + self.free_quantity)
+        paid_items = self.buy_quantity * complete_sets + min(remaining_items, self.buy_quantity)
+        return multiply_cents(self.price_cents, paid_items)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate total prices for a batch of quantities with free items applied.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        cents, buy_quantity = self.price_cents, self.buy_quantity
+        set_size = self.buy_quantity + self.free_quantity
+        if _integer_array(quantities):
+            quantities = quantities.astype("int64")
+            paid_items = quantities // set_size * buy_quantity + (quantities % set_size).clip(0, buy_quantity)
+            return paid_items * cents / 100
+        prices = []
+        for quantity in quantities:
+            if type(quantity) == int:
+                complete_sets, remaining_items = divmod(quantity, set_size)
+                prices.append(cents * (buy_quantity * complete_sets + min(remaining_items, buy_quantity)) / 100)
+            else:
+                prices.append(self.calculate_price(quantity))
+        return prices
+
+    def applied_sets(self, item_quantity: int) -> Tuple[int, int]:
+        """Count the complete sets formed by a quantity and the units given away.
+        
+        Args:
+            item_quantity (int): The number of items
+            
+        Returns:
+            Tuple[int, int]: The number of complete sets and the number of free units
+        """
+        set_size = self.buy_quantity + self.free_quantity
+        complete_sets, remaining_items = divmod(item_quantity, set_size)
+        free_units = self.free_quantity * complete_sets + max(remaining_items - self.buy_quantity, 0)
+        return complete_sets, free_units
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as repeating with every complete set.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (0, buy_quantity + free_quantity)
+        """
+        return 0, self.buy_quantity + self.free_quantity
+
 
 class NForMPricing(PricingStrategy):
     """Pricing strategy that offers N items for a special price M.
     """
+    __slots__ = ("buy_quantity", "m_price", "m_price_cents")
+
     def __init__(self, price: float, buy_quantity: int, m_price: int):
         """Initialize N-for-M pricing with base price, quantity and special price.
         
@@ -164,7 +481,8 @@ class NForMPricing(PricingStrategy):
         check_quantity(buy_quantity)
         check_price(m_price)
         self.buy_quantity = buy_quantity
-        self.m_price = m_price
+        self.m_price_cents = to_cents(m_price)
+        self.m_price = self.m_price_cents / 100
         super().__init__(price)
 
     def calculate_price(self, item_quantity: int) -> float:
@@ -182,10 +500,60 @@ class NForMPricing(PricingStrategy):
         total_price += self.price * remaining_items
         return round(total_price, 2)
 
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with special N-for-M pricing applied.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        complete_sets = item_quantity // self.buy_quantity
+        remaining_items = item_quantity % self.buy_quantity
+        return multiply_cents(self.m_price_cents, complete_sets) + multiply_cents(self.price_cents, remaining_items)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate total prices for a batch of quantities with N-for-M pricing applied.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        cents, m_cents, buy_quantity = self.price_cents, self.m_price_cents, self.buy_quantity
+        if _integer_array(quantities):
+            quantities = quantities.astype("int64")
+            return (quantities // buy_quantity * m_cents + quantities % buy_quantity * cents) / 100
+        return [(quantity // buy_quantity * m_cents + quantity % buy_quantity * cents) / 100
+                if type(quantity) == int else self.calculate_price(quantity) for quantity in quantities]
+
+    def applied_sets(self, item_quantity: int) -> Tuple[int, int]:
+        """Count the complete sets sold for the set price.
+        
+        Args:
+            item_quantity (int): The number of items
+            
+        Returns:
+            Tuple[int, int]: The number of complete sets and no free units
+        """
+        return item_quantity // self.buy_quantity, 0
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as repeating with every complete set.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (0, buy_quantity)
+        """
+        return 0, self.buy_quantity
+
 
 class WeightPricing(PricingStrategy):
     """Pricing strategy that calculates price based on weight.
     """
+    __slots__ = ("weight",)
+
     def __init__(self, price: float, weight: float):
         """Initialize weight-based pricing with base price and weight.
         
@@ -208,3 +576,346 @@ class WeightPricing(PricingStrategy):
         """
         total_price = self.price * (item_quantity/self.weight)
         return round(total_price, 2)
+
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents based on weight.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        return multiply_cents(self.price_cents, item_quantity, self.weight)
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate weight-based total prices for a batch of quantities.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        price, weight = self.price, self.weight
+        return [round(price * (quantity/weight), 2) for quantity in quantities]
+
+    def calculate_regular_price(self, item_quantity: int, cents: bool = False) -> float:
+        """Calculate the regular price of a weight, which is its weight-based price.
+        
+        Args:
+            item_quantity (int): The weight to calculate price for
+            cents (bool, optional): Whether to return integer cents. Defaults to False.
+            
+        Returns:
+            float: The total price, in integer cents if requested
+        """
+        if cents:
+            return self.calculate_price_cents(item_quantity)
+        return self.calculate_price(item_quantity)
+
+
+class TieredPricing(PricingStrategy):
+    """Pricing strategy with quantity-break tiers.
+    
+    The tier thresholds are kept sorted, so the tier of a quantity is found by a
+    binary search. In "all_units" mode every unit is charged the unit price of the
+    tier the quantity reaches. In "graduated" mode every unit is charged the unit
+    price of the tier its own position reaches, using the precomputed price of all
+    the bands below the tier of the quantity.
+    """
+    __slots__ = ("tiers", "mode", "thresholds", "unit_prices", "unit_prices_cents", "starts", "band_prices",
+                 "band_prices_cents")
+
+    def __init__(self, price: float, tiers: Iterable[Tuple[int, float]], mode: str = "all_units"):
+        """Initialize tiered pricing with base price and tiers.
+        
+        Args:
+            price (float): The unit price below the first tier
+            tiers (Iterable[Tuple[int, float]]): The (minimum quantity, unit price) of every tier
+            mode (str, optional): "all_units" or "graduated". Defaults to "all_units".
+        """
+        if mode not in ("all_units", "graduated"):
+            raise ValueError(f"Unknown tier mode: {mode}")
+        tiers = sorted(tiers)
+        for (quantity, unit_price), previous in zip(tiers, [(0, None)] + tiers):
+            check_quantity(quantity)
+            check_price(unit_price)
+            if quantity <= previous[0]:
+                raise ValueError("Tier quantities must be positive and distinct")
+        super().__init__(price)
+        self.tiers = tiers
+        self.mode = mode
+        self.thresholds = [quantity for quantity, _ in tiers]
+        self.unit_prices_cents = [self.price_cents] + [to_cents(unit_price) for _, unit_price in tiers]
+        self.unit_prices = [cents / 100 for cents in self.unit_prices_cents]
+        self.starts = [0] + [quantity - 1 for quantity in self.thresholds]
+        self.band_prices = [0.0]
+        self.band_prices_cents = [0]
+        for tier in range(1, len(self.starts)):
+            band = self.starts[tier] - self.starts[tier - 1]
+            self.band_prices.append(self.band_prices[-1] + self.unit_prices[tier - 1] * band)
+            self.band_prices_cents.append(self.band_prices_cents[-1] + self.unit_prices_cents[tier - 1] * band)
+
+    def calculate_price(self, item_quantity: int) -> float:
+        """Calculate total price with the tier of the quantity applied.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            float: The total price rounded to 2 decimal places
+        """
+        tier = bisect_right(self.thresholds, item_quantity)
+        if self.mode == "all_units":
+            return round(self.unit_prices[tier] * item_quantity, 2)
+        return round(self.band_prices[tier] + self.unit_prices[tier] * (item_quantity - self.starts[tier]), 2)
+
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with the tier of the quantity applied.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        tier = bisect_right(self.thresholds, item_quantity)
+        if self.mode == "all_units":
+            return multiply_cents(self.unit_prices_cents[tier], item_quantity)
+        return self.band_prices_cents[tier] + multiply_cents(self.unit_prices_cents[tier],
+                                                             item_quantity - self.starts[tier])
+
+    def calculate_prices(self, quantities: Iterable[int]) -> List[float]:
+        """Calculate tiered total prices for a batch of quantities.
+        
+        Args:
+            quantities (Iterable[int]): The quantities to calculate prices for
+            
+        Returns:
+            List[float]: The total price of each quantity rounded to 2 decimal places
+        """
+        thresholds, unit_prices = self.thresholds, self.unit_prices_cents
+        band_prices, starts = self.band_prices_cents, self.starts
+        if _integer_array(quantities):
+            import numpy
+            quantities = quantities.astype("int64")
+            tiers = numpy.searchsorted(thresholds, quantities, side="right")
+            unit_prices = numpy.asarray(unit_prices)[tiers]
+            if self.mode == "all_units":
+                return unit_prices * quantities / 100
+            return (numpy.asarray(band_prices)[tiers] + unit_prices * (quantities - numpy.asarray(starts)[tiers])) / 100
+        prices = []
+        all_units = self.mode == "all_units"
+        for quantity in quantities:
+            if type(quantity) != int:
+                prices.append(self.calculate_price(quantity))
+                continue
+            tier = bisect_right(thresholds, quantity)
+            if all_units:
+                prices.append(unit_prices[tier] * quantity / 100)
+            else:
+                prices.append((band_prices[tier] + unit_prices[tier] * (quantity - starts[tier])) / 100)
+        return prices
+
+    def period(self) -> Optional[Tuple[int, int]]:
+        """Describe the price as growing by the same amount with every unit of the last tier.
+        
+        Returns:
+            Optional[Tuple[int, int]]: (the last tier quantity, 1)
+        """
+        return (self.thresholds[-1] if self.thresholds else 0), 1
+
+
+class CombinedPricing(PricingStrategy):
+    """Pricing strategy combining several strategies of the same item.
+    
+    The strategies are split into exclusive groups. Within a group the customer
+    gets the best of the offers: the quantity is split between them by a DP over
+    quantity, where cheapest[n] is the lowest price of n units using the offers seen
+    so far, so every split is covered without enumerating partitions. The periods of
+    the offers bound the DP, so its cost does not grow with the quantity. The groups
+    are then stacked in order: the first group prices the quantity, and every later
+    group takes off the same fraction of the running price as it takes off the
+    regular price.
+    
+    The "best_of" policy puts all strategies in one group, "stack" puts each in
+    its own group, and "exclusive" takes explicit groups.
+    """
+    __slots__ = ("strategies", "policy", "groups", "offers", "_tables")
+
+    def __init__(self, strategies: Iterable[PricingStrategy], policy: str = "best_of",
+                 groups: Optional[Iterable[Iterable[int]]] = None):
+        """Initialize combined pricing with strategies and a combination policy.
+        
+        Args:
+            strategies (Iterable[PricingStrategy]): The strategies to combine, the first one
+                giving the base price
+            policy (str, optional): "best_of", "stack" or "exclusive". Defaults to "best_of".
+            groups (Optional[Iterable[Iterable[int]]], optional): The indices of the strategies
+                in every exclusive group, in stacking order. Required by "exclusive".
+        """
+        strategies = list(strategies)
+        if not strategies:
+            raise ValueError("At least one strategy is required")
+        if policy == "best_of":
+            groups = [list(range(len(strategies)))]
+        elif policy == "stack":
+            groups = [[index] for index in range(len(strategies))]
+        elif policy == "exclusive":
+            if groups is None:
+                raise ValueError("Exclusive policy requires groups")
+            groups = [list(group) for group in groups]
+            if sorted(index for group in groups for index in group) != list(range(len(strategies))) \
+                    or not all(groups):
+                raise ValueError("Groups must contain every strategy exactly once")
+        else:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.strategies = strategies
+        self.policy = policy
+        self.groups = groups
+        self.offers = [[strategies[index] for index in group] for group in groups]
+        self._tables = None
+        super().__init__(strategies[0].price)
+
+    def revision(self) -> Hashable:
+        """Return a token that changes whenever the strategy or one it combines changes.
+        
+        Returns:
+            Hashable: The versions of the strategy and of every strategy it combines
+        """
+        return (self.version, *(strategy.revision() for strategy in self.strategies))
+
+    @staticmethod
+    def _prices(strategy: PricingStrategy, quantities: List[int], cents: bool) -> List[float]:
+        """Price a batch of quantities with one strategy.
+        
+        Args:
+            strategy (PricingStrategy): The strategy
+            quantities (List[int]): The quantities to calculate prices for
+            cents (bool): Whether to price in integer cents
+            
+        Returns:
+            List[float]: The total price of each quantity, in integer cents if requested
+        """
+        if cents:
+            return [strategy.calculate_price_cents(quantity) for quantity in quantities]
+        return strategy.calculate_prices(quantities)
+
+    @staticmethod
+    def _merge(cheapest: List[float], prices: List[float]) -> List[float]:
+        """Combine two price tables by a min-plus convolution.
+        
+        Args:
+            cheapest (List[float]): The lowest price of every quantity using some offers
+            prices (List[float]): The price of every quantity using another offer
+            
+        Returns:
+            List[float]: The lowest price of every quantity using all of them
+        """
+        merged = [None] * (len(cheapest) + len(prices) - 1)
+        for taken, price in enumerate(cheapest):
+            for units, rest in enumerate(prices):
+                candidate = price + rest
+                current = merged[taken + units]
+                if current is None or candidate < current:
+                    merged[taken + units] = candidate
+        return merged
+
+    def _best_of(self, index: int, item_quantity: int, cents: bool) -> float:
+        """Split a quantity between the offers of a group for the lowest price.
+        
+        When every offer has a period, moving a whole number of periods of one offer
+        to an offer with a lower price per period never costs more, so some best
+        split gives every offer but one fewer than start + length * longest period
+        units. The tables of those bounded offers are merged once and kept until the
+        strategy changes, and a call only prices the remaining units with the one
+        unbounded offer, which is independent of the quantity. Without periods the
+        quantity is split by a DP over every quantity up to it.
+        
+        Args:
+            index (int): The index of the group
+            item_quantity (int): The number of items to calculate price for
+            cents (bool): Whether to price in integer cents
+            
+        Returns:
+            float: The lowest total price, in integer cents if requested
+        """
+        group = self.offers[index]
+        if len(group) == 1 or not float(item_quantity).is_integer():
+            prices = (strategy.calculate_price_cents(item_quantity) if cents else
+                      strategy.calculate_price(item_quantity) for strategy in group)
+            return min(prices)
+        item_quantity = int(item_quantity)
+        periods = [strategy.period() for strategy in group]
+        if None in periods:
+            cheapest = None
+            for strategy in group:
+                prices = self._prices(strategy, list(range(item_quantity + 1)), cents)
+                cheapest = prices if cheapest is None else self._merge(cheapest, prices)[:item_quantity + 1]
+            return cheapest[item_quantity]
+        revision = self.revision()
+        if self._tables is None or self._tables[0] != revision:
+            self._tables = (revision, {})
+        key = (index, cents)
+        tables = self._tables[1].get(key)
+        if tables is None:
+            longest = max(length for _, length in periods)
+            bounded = [self._prices(strategy, list(range(start + length * longest)), cents)
+                       for strategy, (start, length) in zip(group, periods)]
+            tables = []
+            for unbounded in range(len(group)):
+                cheapest = [0]
+                for other, prices in enumerate(bounded):
+                    if other != unbounded:
+                        cheapest = self._merge(cheapest, prices)
+                tables.append(cheapest)
+            self._tables[1][key] = tables
+        best = None
+        for strategy, cheapest in zip(group, tables):
+            taken = range(min(len(cheapest), item_quantity + 1))
+            rest = self._prices(strategy, [item_quantity - units for units in taken], cents)
+            price = min(cheapest[units] + rest[units] for units in taken)
+            if best is None or price < best:
+                best = price
+        return best
+
+    def calculate_price(self, item_quantity: int) -> float:
+        """Calculate total price with the groups stacked in order.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            float: The total price rounded to 2 decimal places
+        """
+        total_price = None
+        for index, group in enumerate(self.offers):
+            group_price = self._best_of(index, item_quantity, False)
+            if total_price is None:
+                total_price = group_price
+                continue
+            regular_price = group[0].calculate_regular_price(item_quantity)
+            if regular_price:
+                total_price = total_price * group_price / regular_price
+        return round(total_price, 2)
+
+    def calculate_price_cents(self, item_quantity: int) -> int:
+        """Calculate total price in cents with the groups stacked in order.
+        
+        Args:
+            item_quantity (int): The number of items to calculate price for
+            
+        Returns:
+            int: The exact total price in cents
+        """
+        total_price = None
+        for index, group in enumerate(self.offers):
+            group_price = self._best_of(index, item_quantity, True)
+            if total_price is None:
+                total_price = group_price
+                continue
+            regular_price = group[0].calculate_regular_price(item_quantity, True)
+            if regular_price:
+                total_price = multiply_cents(total_price, group_price, regular_price)
+        return total_price
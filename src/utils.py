@@ -1,5 +1,8 @@
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+
 def check_price(price: float) -> float:
-    if type(price) not in [int, float]:
+    if type(price) not in (int, float):
         raise TypeError("Price must be a number")
     if price < 0:
         raise ValueError("Price cannot be negative")
@@ -19,8 +22,45 @@ def check_discount(discount: int) -> int:
     return discount  
 
 def check_weight(weight: float) -> float:
-    if type(weight) not in [int, float]:
+    if type(weight) not in (int, float):
         raise TypeError("Weight must be a float")
     if weight < 0:
         raise ValueError("Weight cannot be negative")
     return weight
+
+
+def to_cents(amount: float) -> int:
+    """Convert an amount of money to integer cents, rounding half up."""
+    if type(amount) == int:
+        return amount * 100
+    scaled = amount * 100
+    if abs(scaled % 1 - 0.5) > 1e-6:
+        return round(scaled)
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+MICROS = 10 ** 6
+
+def to_micros(amount: float) -> int:
+    """Convert a quantity or weight to an integer number of millionths, or None if
+    it has more than 6 decimals or is too large to be scaled exactly."""
+    if type(amount) == int:
+        return amount * MICROS
+    micros = round(amount * MICROS)
+    if abs(amount) < 2 ** 32 and micros / MICROS == amount:
+        return micros
+    return None
+
+def multiply_cents(cents: int, factor: float, divisor: float = 1) -> int:
+    """Compute cents * factor / divisor exactly, rounding half up to whole cents."""
+    if type(factor) == int and type(divisor) == int:
+        numerator, denominator = cents * factor, divisor
+    else:
+        scaled_factor, scaled_divisor = to_micros(factor), to_micros(divisor)
+        if scaled_factor is not None and scaled_divisor is not None:
+            numerator, denominator = cents * scaled_factor, scaled_divisor
+        else:
+            ratio = cents * Fraction(str(factor)) / Fraction(str(divisor))
+            numerator, denominator = ratio.numerator, ratio.denominator
+    if denominator == 1:
+        return numerator
+    return (2 * numerator + denominator) // (2 * denominator)
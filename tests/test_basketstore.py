@@ -0,0 +1,65 @@
+import pytest
+from src.basketstore import BasketStore, reprice, write_baskets
+from src.catalog import Catalog
+from src.checkout import Checkout
+from tests.test_checkout import get_rules
+
+BASKETS = [
+    [("A", 1), ("B", 1), ("A", 1)],
+    [],
+    [("F", 2.5), ("C", 3), ("D", 5)],
+    [("E", 4), ("C", 1)],
+]
+
+def test_basket_store(tmp_path):
+    path = str(tmp_path / "baskets.bin")
+    write_baskets(path, BASKETS)
+    with BasketStore(path) as store:
+        assert len(store) == 4
+        assert store.basket(0) == [("A", 2.0), ("B", 1.0)]
+        assert store.basket(1) == []
+        assert store.basket(2) == [("F", 2.5), ("C", 3.0), ("D", 5.0)]
+        assert store.skus == ["A", "B", "F", "C", "D", "E"]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_reprice(tmp_path, chunk_size):
+    path = str(tmp_path / "baskets.bin")
+    write_baskets(path, BASKETS)
+    expected = 0
+    for basket in BASKETS:
+        checkout = Checkout(get_rules())
+        for item, quantity in basket:
+            checkout.scan(item, quantity)
+        expected += checkout.calculate_total_price()
+    with BasketStore(path) as store:
+        report = reprice(store, get_rules(), chunk_size)
+    assert (report.baskets, report.lines) == (4, 7)
+    assert report.revenue == round(expected, 2)
+    assert report.units_by_sku["C"] == 4
+    assert report.revenue_by_sku["C"] == pytest.approx(10.8 + 4)
+    assert report.as_dict()["revenue_by_strategy"]["NDiscountMPricing"] == 14.8
+
+def test_reprice_missing_skus(tmp_path):
+    path = str(tmp_path / "baskets.bin")
+    write_baskets(path, BASKETS)
+    rules = get_rules()
+    del rules["C"], rules["E"]
+    with BasketStore(path) as store:
+        with pytest.raises(ValueError, match="missing from the catalog: C, E$"):
+            reprice(store, rules)
+        with pytest.raises(ValueError, match="missing"):
+            reprice(store, Catalog(rules))
+
+def test_not_a_store(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        BasketStore(str(path))
+
+@pytest.mark.parametrize("size", [0, 8, -1])
+def test_truncated_store(tmp_path, size):
+    path = tmp_path / "baskets.bin"
+    write_baskets(str(path), BASKETS)
+    path.write_bytes(path.read_bytes()[:size])
+    with pytest.raises(ValueError, match="Not a basket store"):
+        BasketStore(str(path))
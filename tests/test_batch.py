@@ -0,0 +1,24 @@
+import random
+from src.batch import BatchCheckout
+from src.checkout import Checkout
+from tests.test_checkout import get_rules, scan_items
+
+def test_batch_checkout():
+    baskets = {1: "ABCBBCCC", 2: "DDEEDDEDDE", "three": "AAFAA"}
+    basket_ids, items = [], []
+    for basket_id, basket in baskets.items():
+        basket_ids.extend([basket_id] * len(basket))
+        items.extend(basket)
+    quantities = [2.5 if item == "F" else 1 for item in items]
+    totals = BatchCheckout(get_rules()).calculate_total_prices(basket_ids, items, quantities)
+    assert totals == {1: 20.8, 2: 15.0, "three": 29.0}
+
+def test_batch_checkout_matches_checkout():
+    rng = random.Random(0)
+    basket_ids = [rng.randrange(50) for _ in range(2000)]
+    items = [rng.choice("ABCDEF") for _ in basket_ids]
+    totals = BatchCheckout(get_rules()).calculate_total_prices(basket_ids, items)
+    for basket_id in set(basket_ids):
+        checkout = Checkout(get_rules())
+        scan_items(checkout, [item for b, item in zip(basket_ids, items) if b == basket_id])
+        assert totals[basket_id] == checkout.calculate_total_price()
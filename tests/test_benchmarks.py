@@ -0,0 +1,48 @@
+from benchmarks import differential
+from benchmarks.run import collect, compare, measure
+
+def test_collect():
+    names = [name for name, _, _ in collect("strategy.RegularPricing")]
+    assert names == ["strategy.RegularPricing.calculate_price",
+                     "strategy.RegularPricing.calculate_price_cents",
+                     "strategy.RegularPricing.calculate_prices[1k]"]
+
+def test_measure():
+    result = measure(lambda: sum(range(10)), 10, repeat=1)
+    assert result["seconds"] > 0
+    assert result["ops_per_second"] > 0
+
+def test_compare():
+    baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}
+    results = {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "c": {"seconds": 9.0}}
+    assert compare(results, baseline, 0.2) == {"b": 1.5}
+
+def test_differential():
+    paths = list(differential.SRC_PATHS) + list(differential.PROMOTION_PATHS) + ["solution2.dp", "solution2.bnb"]
+    report = differential.run(cases=30, seed=1, paths=paths)
+    assert report["mismatches"] == []
+    assert set(report["throughput"]) == set(paths)
+
+def test_bundle_path_reuses_checkout():
+    path = differential._BundlePath("dp")
+    rules = {"A": 1.0, "B": 2.0, "AB": 2.5}
+    assert path(rules, ["A", "B"]) == 2.5
+    checkout = path._checkout
+    assert path(dict(rules), ["A", "A", "B"]) == 3.5
+    assert path._checkout is checkout
+    assert path({"A": 1.0}, ["A"]) == 1.0
+    assert path._checkout is not checkout
+    path.close()
+    assert path._checkout is None
+
+def test_differential_shrinks(monkeypatch):
+    def broken(rules, basket):
+        total = differential.reference_total(rules, basket)
+        return total + 1 if len(basket) >= 2 else total
+    monkeypatch.setitem(differential.SRC_PATHS, "broken", (broken, differential.reference_total))
+    report = differential.run(cases=5, seed=2, paths=["broken"])
+    assert report["mismatches"]
+    for mismatch in report["mismatches"]:
+        assert len(mismatch["basket"]) == 2
+        assert set(mismatch["catalog"]) == {sku for sku, _ in mismatch["basket"]}
+        assert mismatch["actual"] == mismatch["expected"] + 1
@@ -0,0 +1,72 @@
+from threading import Thread
+import pytest
+from src.cache import PriceCache
+from src.rule import Rule
+from src.strategy import DiscountPricing, NForMPricing, RegularPricing
+
+def test_price_cache_lru():
+    cache = PriceCache(2)
+    cache.put(1, 10.0)
+    cache.put(2, 20.0)
+    assert cache.get(1) == 10.0
+    cache.put(3, 30.0)
+    assert cache.get(2) is None
+    assert cache.get(3) == 30.0
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+    with pytest.raises(ValueError):
+        PriceCache(0)
+
+def test_rule_cache():
+    rule = Rule(NForMPricing(price=2, buy_quantity=3, m_price=5), cache_size=8)
+    assert rule.calculate_price(4) == 7.0
+    assert rule.calculate_price(4) == 7.0
+    assert rule.calculate_price_cents(4) == 700
+    assert (rule.cache.hits, rule.cache.misses) == (1, 2)
+    assert Rule(RegularPricing(price=1)).cache is None
+
+def test_rule_cache_invalidation():
+    rule = Rule(NForMPricing(price=2, buy_quantity=3, m_price=5), cache_size=8)
+    assert rule.calculate_price(3) == 5.0
+    rule.strategy.update(m_price=4)
+    assert rule.calculate_price(3) == 4.0
+    assert rule.calculate_price_cents(3) == 400
+    rule.strategy = RegularPricing(price=1)
+    assert rule.calculate_price(3) == 3.0
+    assert rule.cache.hits == 0
+
+def test_rule_cache_invalidation_nested():
+    rule = Rule([NForMPricing(price=2, buy_quantity=3, m_price=5), DiscountPricing(price=2, discount=10)],
+                cache_size=8)
+    assert rule.calculate_price(3) == 5.0
+    rule.strategy.strategies[0].update(m_price=1)
+    assert rule.calculate_price(3) == 1.0
+    with pytest.raises(TypeError):
+        rule.strategy.update(m_price=1)
+
+def test_rule_cache_invalidation_replaced():
+    rule = Rule([RegularPricing(price=5), DiscountPricing(price=5, discount=0)], cache_size=8)
+    rule.strategy.strategies[1].update(discount=80)
+    assert rule.calculate_price(3) == 3.0
+    rule.strategy.update(strategies=[RegularPricing(price=5), DiscountPricing(price=5, discount=0)])
+    assert rule.calculate_price(3) == 15.0
+    assert rule.calculate_price_cents(3) == 1500
+
+def test_rule_cache_threads():
+    rule = Rule(NForMPricing(price=2, buy_quantity=3, m_price=5), cache_size=2)
+    errors = []
+
+    def run():
+        try:
+            for quantity in range(2000):
+                assert rule.calculate_price(quantity % 5) == NForMPricing(2, 3, 5).calculate_price(quantity % 5)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(rule.cache) <= 2
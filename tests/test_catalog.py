@@ -0,0 +1,95 @@
+import pytest
+from src.catalog import Catalog, VersionedCatalog
+from src.checkout import Checkout
+from src.rule import Rule, ScheduledRule
+from src.strategy import NForMPricing, RegularPricing
+from tests.test_checkout import get_rules, scan_items
+
+def test_catalog():
+    rules = get_rules()
+    catalog = Catalog(rules)
+    assert catalog.skus == ["A", "B", "C", "D", "E", "F"]
+    assert catalog.sku_ids["C"] == 2
+    assert catalog["C"] is rules["C"]
+    assert "F" in catalog and "G" not in catalog
+    assert len(catalog) == 6
+
+def test_shared_catalog():
+    catalog = Catalog(get_rules())
+    first, second = Checkout(catalog), Checkout(catalog)
+    scan_items(first, "AA|F2.5|AA")
+    scan_items(second, "ABCBBCCC")
+    assert first.scanned_items == {"A": 4, "F": 2.5}
+    assert first.calculate_total_price() == 29.0
+    assert second.calculate_total_price() == 20.8
+
+def test_slots():
+    checkout = Checkout(get_rules())
+    with pytest.raises(AttributeError):
+        checkout.extra = 1
+    with pytest.raises(AttributeError):
+        get_rules()["A"].strategy.extra = 1
+
+def test_sparse_basket():
+    rules = {f"S{index}": Rule(RegularPricing(1 + index / 100)) for index in range(100)}
+    catalog = Catalog(rules)
+    checkout = Checkout(catalog)
+    items = [f"S{index}" for index in range(99, 20, -3)] * 2 + ["S5"]
+    for count, item in enumerate(items, 1):
+        checkout.scan(item)
+        expected = {}
+        for scanned in items[:count]:
+            expected[scanned] = expected.get(scanned, 0) + 1
+        assert checkout.calculate_total_price() == round(
+            sum(rules[sku].calculate_price(quantity) for sku, quantity in expected.items()), 2)
+    assert list(checkout.scanned_items) == list(expected)
+    assert [line.sku for line in checkout.receipt().lines] == list(expected)
+
+def test_versioned_catalog():
+    versioned = VersionedCatalog(get_rules())
+    first = versioned.current
+    pinned = Checkout(versioned)
+    following = Checkout(versioned, follow_latest=True)
+    for checkout in (pinned, following):
+        scan_items(checkout, "AAB")
+    assert following.calculate_total_price() == 3.8
+    second = versioned.publish({"A": Rule(RegularPricing(2)), "G": Rule(RegularPricing(5))})
+    assert versioned.current is second and second.version == 1
+    assert first["A"].strategy.price == 1 and "G" not in first
+    assert second["A"].strategy.price == 2 and second.sku_ids["G"] == 6
+    assert second.rules[1] is first.rules[1]
+    assert pinned.calculate_total_price() == 3.8
+    assert following.calculate_total_price() == 5.8
+    following.scan("G")
+    assert following.calculate_total_price() == 10.8
+    with pytest.raises(KeyError):
+        pinned.scan("G")
+
+def test_versioned_catalog_unscheduled():
+    now = [10]
+    versioned = VersionedCatalog({"A": ScheduledRule(RegularPricing(1), [(10, 20, NForMPricing(1, 3, 2))],
+                                                     clock=lambda: now[0])})
+    following = Checkout(versioned, follow_latest=True)
+    scan_items(following, "AAA")
+    assert following.calculate_total_price() == 2.0
+    versioned.publish({"A": Rule(RegularPricing(3))})
+    now[0] = 20
+    assert following.calculate_total_price() == 9.0
+    assert following.receipt().total == 9.0
+
+def test_versioned_catalog_compaction():
+    versioned = VersionedCatalog(get_rules(), compact_ratio=0)
+    for version in range(1, 70):
+        latest = versioned.publish({f"N{version}": Rule(RegularPricing(version))})
+    assert len(latest) == 75 and len(latest.changes) == 4
+    assert latest["N1"].strategy.price == 1 and latest["N69"].strategy.price == 69
+    assert list(latest)[:6] == ["A", "B", "C", "D", "E", "F"]
+    assert latest.pending == 4 and isinstance(latest.root, Catalog) and latest.base is latest.root
+
+def test_versioned_catalog_layers():
+    versioned = VersionedCatalog(get_rules())
+    versions = [versioned.publish({f"N{version}": Rule(RegularPricing(version))}) for version in range(1, 8)]
+    assert [len(version.changes) for version in versions] == [1, 2, 1, 4, 1, 2, 1]
+    assert versions[-1].base is versions[-2] and versions[-2].base is versions[3]
+    assert [versions[-1][f"N{version}"].strategy.price for version in range(1, 8)] == list(range(1, 8))
+    assert "N7" not in versions[-2] and versions[2]["N3"].strategy.price == 3
@@ -49,5 +49,23 @@ def test_F():
     scan_items(checkout, items)
     assert checkout.calculate_total_price() == 29.0
 
+def test_cents():
+    for items, total in [("ABCBBCCC", 20.8), ("DDEEDDEDDE", 15.0), ("AA|F2.5|AA", 29.0)]:
+        checkout = Checkout(get_rules(), money_mode="cents")
+        scan_items(checkout, items)
+        assert checkout.calculate_total_price() == total
+        assert checkout.calculate_total_cents() == round(total * 100)
 
+def test_unknown_money_mode():
+    with pytest.raises(ValueError):
+        Checkout(get_rules(), money_mode="euros")
 
+def test_running_total():
+    for money_mode in ("float", "cents"):
+        checkout = Checkout(get_rules(), money_mode=money_mode)
+        tokens = list("DDEEDDEDDE") + ["|F2.5|"] + list("ABC")
+        for end, token in enumerate(tokens, 1):
+            scan_items(checkout, token)
+            fresh = Checkout(get_rules(), money_mode=money_mode)
+            scan_items(fresh, "".join(tokens[:end]))
+            assert checkout.calculate_total_price() == fresh.calculate_total_price()
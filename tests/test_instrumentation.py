@@ -0,0 +1,36 @@
+import json
+from src import instrumentation
+from src.checkout import Checkout
+from solution2.checkout import Checkout as BundleCheckout
+from solution2.test_checkout import get_rules as get_bundle_rules
+from tests.test_checkout import get_rules, scan_items
+
+def test_disabled():
+    instrumentation.reset()
+    checkout = Checkout(get_rules())
+    scan_items(checkout, "ABC")
+    checkout.calculate_total_price()
+    assert instrumentation.stats() == {"timers": {}, "counters": {}}
+
+def test_enabled(tmp_path):
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        checkout = Checkout(get_rules())
+        scan_items(checkout, "ABCBBCCC")
+        checkout.calculate_total_price()
+        bundle_checkout = BundleCheckout(get_bundle_rules(), optimizer="bnb")
+        bundle_checkout.calculate_price(list("CDCCDCD"))
+    finally:
+        instrumentation.disable()
+    stats = instrumentation.stats()
+    assert stats["timers"]["checkout.scan"]["count"] == 8
+    assert sum(stats["timers"]["checkout.scan"]["histogram_us"].values()) == 8
+    assert stats["timers"]["strategy.DiscountPricing"]["count"] == 1
+    assert stats["timers"]["sku.C"]["count"] == 1
+    assert stats["timers"]["solution2.BranchAndBoundOptimizer.solve"]["count"] == 1
+    assert stats["counters"]["solution2.BranchAndBoundOptimizer.nodes"] > 0
+    path = tmp_path / "stats.json"
+    instrumentation.dump_json(str(path))
+    assert json.loads(path.read_text()) == json.loads(json.dumps(stats))
+    instrumentation.reset()
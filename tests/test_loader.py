@@ -0,0 +1,95 @@
+import json
+import pytest
+from src.catalog import Catalog
+from src.checkout import Checkout
+from src.loader import load, load_catalog, load_snapshot, rules_from_records, save_snapshot
+from src.rule import Rule, ScheduledRule
+from src.strategy import DiscountPricing, RegularPricing
+from tests.test_checkout import scan_items
+
+CSV = """sku,strategy,price,discount,buy_quantity,free_quantity,m_price,weight
+A,regular,1,,,,,
+B,discount,2,10,,,,
+C,n_discount_m,4,10,3,,,
+D,buy_n_get_m_free,3,,3,2,,
+E,n_for_m,1,,3,,2,
+F,weight,10,,,,,1
+"""
+
+def write_catalog(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(CSV)
+    return str(path)
+
+def test_load_catalog(tmp_path):
+    catalog = load_catalog(write_catalog(tmp_path))
+    checkout = Checkout(catalog)
+    scan_items(checkout, "ABCBBCCCDDEEDDEDDE|F2.5|")
+    assert checkout.calculate_total_price() == 60.8
+
+def test_load_json(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps([{"sku": "A", "strategy": "n_for_m", "price": 1, "buy_quantity": 3, "m_price": 2}]))
+    assert load_catalog(str(path))["A"].calculate_price(4) == 3.0
+
+def test_invalid_records():
+    with pytest.raises(ValueError, match="Row 1"):
+        rules_from_records([{"sku": "A", "strategy": "regular", "price": 1},
+                            {"sku": "B", "strategy": "regular", "price": -1}])
+    with pytest.raises(ValueError, match="unknown strategy"):
+        rules_from_records([{"sku": "A", "strategy": "free", "price": 1}])
+    with pytest.raises(ValueError, match="Row 0: Discount must be between 0 and 100"):
+        rules_from_records([{"sku": "A", "strategy": "discount", "price": 1, "discount": 101}])
+    with pytest.raises(TypeError):
+        rules_from_records([{"sku": "A", "strategy": "discount", "price": 1}])
+    with pytest.raises(ValueError, match="Row 1: Duplicate"):
+        rules_from_records([{"sku": "A", "strategy": "regular", "price": 1}] * 2)
+
+def test_snapshot(tmp_path):
+    catalog = load_catalog(write_catalog(tmp_path))
+    path = str(tmp_path / "catalog.snapshot")
+    save_snapshot(catalog, path)
+    snapshot = load_snapshot(path)
+    assert len(snapshot) == 6
+    assert list(snapshot) == ["A", "B", "C", "D", "E", "F"]
+    assert "C" in snapshot and "G" not in snapshot
+    for sku in catalog:
+        for quantity in [1, 3, 7, 2.5]:
+            assert snapshot[sku].calculate_price(quantity) == catalog[sku].calculate_price(quantity)
+    checkout = Checkout(snapshot)
+    scan_items(checkout, "ABCBBCCCDDEEDDEDDE|F2.5|")
+    assert checkout.calculate_total_price() == 60.8
+    snapshot.close()
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("sku,strategy,price,buy_quantity,m_price\nA,regular,1.005,,\nB,n_for_m,0.125,3,2.675\n")
+    catalog = load_catalog(str(path))
+    save_snapshot(catalog, str(tmp_path / "catalog.snapshot"))
+    with load_snapshot(str(tmp_path / "catalog.snapshot")) as snapshot:
+        for sku in catalog:
+            for quantity in [1, 4]:
+                assert snapshot[sku].calculate_price_cents(quantity) == catalog[sku].calculate_price_cents(quantity)
+        assert snapshot["A"].calculate_price_cents(1) == 101
+
+@pytest.mark.parametrize("size", [0, 8, -1])
+def test_truncated_snapshot(tmp_path, size):
+    path = tmp_path / "catalog.snapshot"
+    save_snapshot(load_catalog(write_catalog(tmp_path)), str(path))
+    path.write_bytes(path.read_bytes()[:size])
+    with pytest.raises(ValueError, match="Not a catalog snapshot"):
+        load_snapshot(str(path))
+
+def test_snapshot_unsupported(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    scheduled = ScheduledRule(RegularPricing(1), [(0, 2 ** 40, DiscountPricing(1, 50))])
+    with pytest.raises(TypeError, match="ScheduledRule"):
+        save_snapshot(Catalog({"A": scheduled}), path)
+    with pytest.raises(TypeError, match="CombinedPricing"):
+        save_snapshot(Catalog({"A": Rule([RegularPricing(1), DiscountPricing(1, 50)])}), path)
+
+def test_load_cached(tmp_path):
+    path = write_catalog(tmp_path)
+    first = load(path)
+    second = load(path)
+    assert first["E"].calculate_price(7) == second["E"].calculate_price(7) == 5.0
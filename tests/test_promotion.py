@@ -0,0 +1,98 @@
+import pytest
+from src.catalog import Catalog
+from src.checkout import Checkout
+from src.promotion import BundlePromotion, MixAndMatchPromotion, PromotionEngine
+from src.rule import Rule
+from src.strategy import RegularPricing
+from tests.test_checkout import get_rules, scan_items
+
+def meal_deal():
+    return BundlePromotion({"C": 1, "D": 1}, 5)
+
+def any_three():
+    return MixAndMatchPromotion(["A", "B", "C"], 3, 5)
+
+def total(items, promotions, money_mode="float"):
+    checkout = Checkout(get_rules(), money_mode, promotions=promotions)
+    scan_items(checkout, items)
+    return checkout.calculate_total_price()
+
+def test_bundle():
+    assert total("CD", [meal_deal()]) == 5.0
+    assert total("CCDDA", [meal_deal()]) == 11.0
+    assert total("CCC", [meal_deal()]) == total("CCC", [])
+
+def test_mix_and_match():
+    assert total("ABC", [any_three()]) == 5.0
+    assert total("AABCC", [any_three()]) == 7.0
+    assert total("AB", [any_three()]) == 2.8
+
+def test_overlapping_promotions():
+    assert total("ABCD", [meal_deal(), any_three()]) == 7.8
+    assert total("ABCCD", [meal_deal(), any_three()]) == 9.0
+    assert total("ABCCD", [meal_deal(), any_three()], "cents") == 9.0
+
+def test_search_budget():
+    catalog = Catalog(get_rules())
+    engine = PromotionEngine(catalog, [meal_deal(), any_three()], max_states=1)
+    checkout = Checkout(catalog, promotions=engine)
+    scan_items(checkout, "ABCCD")
+    assert 9.0 <= checkout.calculate_total_price() <= total("ABCCD", [])
+    assert not engine.optimal
+    engine.max_states = 10000
+    checkout = Checkout(catalog, promotions=engine)
+    scan_items(checkout, "ABCCD")
+    assert checkout.calculate_total_price() == 9.0
+    assert engine.optimal
+
+def test_search_budget_overlapping_basket():
+    prices = {"A": 2.49, "B": 1.99, "C": 3.75, "D": 0.89, "E": 4.2, "F": 1.35}
+    catalog = Catalog({sku: Rule(RegularPricing(price)) for sku, price in prices.items()})
+    promotions = [MixAndMatchPromotion(["A", "B", "C"], 3, 5), MixAndMatchPromotion(["C", "D", "E", "F"], 4, 8),
+                  BundlePromotion({"A": 2, "E": 1}, 7.5), MixAndMatchPromotion(["B", "D", "F"], 2, 2.5)]
+    checkout = Checkout(catalog, "cents", promotions=promotions)
+    for sku, quantity in [("A", 3), ("B", 2), ("C", 3), ("D", 3), ("E", 2), ("F", 3), ("A", 2),
+                          ("C", 2), ("E", 3), ("B", 3), ("D", 2), ("F", 2), ("A", 1), ("E", 1)]:
+        checkout.scan(sku, quantity)
+    # The exhaustive optimum; spending the budget on revisited states used to stop at 4930.
+    assert checkout.calculate_total_cents() == 4795
+
+def test_search_bounded_per_state():
+    skus = [f"S{index}" for index in range(20)]
+    catalog = Catalog({sku: Rule(RegularPricing(1 + index / 4)) for index, sku in enumerate(skus)})
+    promotion = MixAndMatchPromotion(skus, 4, 3)
+    assert len(list(promotion.consumptions((1,) * 20))) == 4845
+    assert next(promotion.consumptions((2,) * 20, order=range(19, -1, -1)))[-2:] == (2, 2)
+    engine = PromotionEngine(catalog, [promotion, BundlePromotion({"S0": 1, "S19": 1}, 4)])
+    checkout = Checkout(catalog, promotions=engine)
+    for sku in skus * 3:
+        checkout.scan(sku)
+    assert checkout.calculate_total_price() == 45.0
+
+def test_search_tries_every_promotion():
+    skus = ["A", "B", "C", "D"]
+    catalog = Catalog({sku: Rule(RegularPricing(4)) for sku in skus})
+    promotions = [MixAndMatchPromotion(skus, 3, 14), MixAndMatchPromotion(skus, 2, 12),
+                  MixAndMatchPromotion(["A"], 3, 9)]
+    checkout = Checkout(catalog, "cents", promotions=PromotionEngine(catalog, promotions, max_children=2))
+    for sku in "AAABBBCCC":
+        checkout.scan(sku)
+    assert checkout.calculate_total_cents() == 3300
+
+def test_incremental_promotions():
+    catalog = Catalog(get_rules())
+    engine = PromotionEngine(catalog, [meal_deal(), any_three()])
+    checkout = Checkout(catalog, promotions=engine)
+    for item in "ABCCDF":
+        checkout.scan(item)
+        fresh = Checkout(catalog, promotions=engine)
+        scan_items(fresh, "".join(checkout.scanned_items.get(sku, 0) * sku for sku in catalog))
+        assert checkout.calculate_total_price() == fresh.calculate_total_price()
+    assert checkout.calculate_total_cents() == 1900
+    assert len(engine.components) == 1
+
+def test_invalid_promotions():
+    with pytest.raises(ValueError):
+        Checkout(get_rules(), promotions=[BundlePromotion({"Z": 1}, 1)])
+    with pytest.raises(ValueError):
+        MixAndMatchPromotion(["A"], 0, 1)
@@ -0,0 +1,27 @@
+from src.checkout import Checkout
+from src.promotion import BundlePromotion
+from tests.test_checkout import get_rules, scan_items
+
+def test_receipt():
+    checkout = Checkout(get_rules())
+    scan_items(checkout, "AACCCDDDDDDEEEE|F1.5|")
+    receipt = checkout.receipt()
+    lines = {line.sku: line for line in receipt.lines}
+    assert lines["C"].as_dict() == {"sku": "C", "quantity": 3, "strategy": "NDiscountMPricing",
+                                    "price": 10.8, "regular_price": 12.0, "savings": 1.2,
+                                    "sets": 1, "free_units": 0}
+    assert (lines["D"].price, lines["D"].sets, lines["D"].free_units, lines["D"].savings) == (12.0, 1, 2, 6.0)
+    assert (lines["E"].sets, lines["E"].savings) == (1, 1.0)
+    assert (lines["A"].savings, lines["F"].savings, lines["F"].quantity) == (0, 0, 1.5)
+    assert receipt.savings == 8.2
+    assert receipt.total == checkout.calculate_total_price() == 42.8
+    assert receipt.format().splitlines()[-1].endswith("42.80")
+
+def test_receipt_cents_promotions():
+    checkout = Checkout(get_rules(), "cents", promotions=[BundlePromotion({"C": 1, "D": 1}, 5)])
+    scan_items(checkout, "ACD")
+    receipt = checkout.receipt()
+    assert [line.price for line in receipt.lines] == [100, 400, 300]
+    assert receipt.promotion_savings == 200
+    assert receipt.as_dict()["savings"] == 200
+    assert receipt.total == checkout.calculate_total_cents() == 600
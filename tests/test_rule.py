@@ -1,6 +1,71 @@
-from src.rule import Rule
-from src.strategy import RegularPricing
+import pytest
+from src.checkout import Checkout
+from src.rule import Rule, ScheduledRule
+from src.strategy import BuyNGetMFreePricing, DiscountPricing, NForMPricing, RegularPricing, TieredPricing
 
 def test_rule():
     rule = Rule(strategy=RegularPricing(price=10))
     assert rule.calculate_price(10) == 100.0
+
+def test_rule_calculate_prices():
+    rule = Rule(strategy=RegularPricing(price=10))
+    assert rule.calculate_prices([0, 1, 10]) == [0.0, 10.0, 100.0]
+
+def test_scheduled_rule():
+    now = [0]
+    weekend = NForMPricing(price=1, buy_quantity=3, m_price=2)
+    sale = DiscountPricing(price=1, discount=50)
+    rule = ScheduledRule(RegularPricing(price=1), [(20, 30, sale), (10, 20, weekend)],
+                         clock=lambda: now[0])
+    assert rule.boundaries == [10, 20, 30]
+    for time, price in [(0, 3.0), (10, 2.0), (19.5, 2.0), (20, 1.5), (30, 3.0)]:
+        now[0] = time
+        assert rule.calculate_price(3) == price
+    with pytest.raises(ValueError):
+        ScheduledRule(RegularPricing(price=1), [(0, 10, sale), (5, 15, weekend)])
+
+def test_scheduled_checkout():
+    now = [0]
+    rules = {"A": ScheduledRule(RegularPricing(price=1), [(10, 20, NForMPricing(1, 3, 2))],
+                                clock=lambda: now[0]),
+             "B": Rule(RegularPricing(price=2))}
+    checkout = Checkout(rules)
+    for item in "AAAB":
+        checkout.scan(item)
+    assert checkout.calculate_total_price() == 5.0
+    now[0] = 10
+    assert checkout.calculate_total_price() == 4.0
+    now[0] = 20
+    assert checkout.calculate_total_price() == 5.0
+
+def test_combined_rule():
+    best_of = Rule([NForMPricing(1, 3, 2), DiscountPricing(1, 20)])
+    assert [best_of.calculate_price(quantity) for quantity in (1, 3, 4, 7)] == [0.8, 2.0, 2.8, 4.8]
+    assert best_of.calculate_price_cents(4) == 280
+    stacked = Rule([BuyNGetMFreePricing(3, 2, 1), DiscountPricing(3, 10)], policy="stack")
+    assert stacked.calculate_price(3) == 5.4
+    assert stacked.calculate_price_cents(3) == 540
+    exclusive = Rule([NForMPricing(1, 3, 2), DiscountPricing(1, 20), DiscountPricing(1, 10)],
+                     policy="exclusive", groups=[[0, 1], [2]])
+    assert exclusive.calculate_price(4) == 2.52
+    assert exclusive.calculate_prices([0, 4]) == [0.0, 2.52]
+    with pytest.raises(ValueError):
+        Rule([RegularPricing(1)], policy="cheapest")
+    with pytest.raises(ValueError):
+        Rule([RegularPricing(1), RegularPricing(2)], policy="exclusive", groups=[[0], [0]])
+
+def test_combined_rule_split():
+    offers = [NForMPricing(2, 3, 5), BuyNGetMFreePricing(2, 4, 1), TieredPricing(2, [(7, 1.9)])]
+    rule = Rule(offers)
+
+    def split(quantity):
+        cheapest = [offers[0].calculate_price_cents(units) for units in range(quantity + 1)]
+        for offer in offers[1:]:
+            cheapest = [min(cheapest[total - units] + offer.calculate_price_cents(units) for units in range(total + 1))
+                        for total in range(quantity + 1)]
+        return cheapest[quantity]
+
+    assert [rule.calculate_price_cents(quantity) for quantity in range(40)] == [split(q) for q in range(40)]
+    assert rule.calculate_price_cents(100000) == 100000 // 5 * 800
+    rule.strategy.update(strategies=offers[::2])
+    assert rule.calculate_price_cents(3) == 500
@@ -0,0 +1,37 @@
+import io
+import pytest
+from src.checkout import Checkout
+from src.scanlog import parse_scan_log, read_chunks, replay
+from tests.test_checkout import get_rules
+
+def test_parse_scan_log():
+    assert list(parse_scan_log(["AA|F2.5|A\nB"])) == [("A", 1), ("A", 1), ("F", 2.5), ("A", 1), ("B", 1)]
+
+def test_parse_split_chunks():
+    log = "AB|F12.25|C|F3|"
+    expected = list(parse_scan_log([log]))
+    for size in range(1, len(log) + 1):
+        chunks = [log[i:i + size] for i in range(0, len(log), size)]
+        assert list(parse_scan_log(chunks)) == expected
+        assert list(parse_scan_log(chunk.encode() for chunk in chunks)) == expected
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        list(parse_scan_log(["A|F2.5"]))
+    with pytest.raises(ValueError):
+        list(parse_scan_log(["A|F|"]))
+
+def test_parse_record_limit():
+    assert list(parse_scan_log(["|F1.25|"], max_record=7)) == [("F", 1.25)]
+    with pytest.raises(ValueError, match="longer than 6"):
+        list(parse_scan_log(["|F1.25|"], max_record=6))
+    chunks = iter(["A|F"] + ["1"] * 10 ** 6)
+    with pytest.raises(ValueError, match="longer than 64"):
+        list(parse_scan_log(chunks))
+    assert len(list(chunks)) > 10 ** 6 - 100
+
+def test_replay_file():
+    log = io.BytesIO(b"AA|F2.5|AA\n" * 1000)
+    checkout = Checkout(get_rules())
+    assert replay(checkout, read_chunks(log, chunk_size=7)) == 5000
+    assert checkout.scanned_items == {"A": 4000, "F": 2500.0}
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from src.loadgen import CheckoutClient, run_local
+from src.server import CheckoutServer
+from tests.test_checkout import get_rules
+
+def test_handle():
+    server = CheckoutServer(get_rules())
+    checkout, reply = server.handle(None, {"op": "scan", "item": "A"})
+    assert reply == {"ok": False, "error": "No open basket"}
+    checkout, reply = server.handle(None, {"op": "open"})
+    assert reply == {"ok": True}
+    checkout, reply = server.handle(checkout, {"op": "scan", "item": "G"})
+    assert reply == {"ok": False, "error": "Unknown item: G"}
+    checkout, reply = server.handle(checkout, {"op": "refund"})
+    assert reply == {"ok": False, "error": "Unknown op: refund"}
+
+def test_server():
+    async def session():
+        listener = await CheckoutServer(get_rules()).start()
+        async with listener:
+            client = await CheckoutClient.connect(port=listener.sockets[0].getsockname()[1])
+            await client.open()
+            for item in "AA":
+                await client.scan(item)
+            await client.scan("F", 2.5)
+            await client.scan("A", 2)
+            assert await client.total() == 29.0
+            assert await client.close() == 29.0
+            with pytest.raises(RuntimeError):
+                await client.total()
+            await client.disconnect()
+    asyncio.run(session())
+
+def test_load():
+    stats = asyncio.run(run_local(clients=4, baskets=2, items=5))
+    assert stats["scans"] == 40
+    assert stats["p50_ms"] <= stats["p99_ms"]
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.service import CheckoutService
+from tests.test_checkout import get_rules
+
+def test_service():
+    service = CheckoutService(get_rules())
+    service.open("lane-1")
+    for item in "ABCBBCCC":
+        service.scan("lane-1", item)
+    assert service.total("lane-1") == 20.8
+    with pytest.raises(ValueError):
+        service.open("lane-1")
+    assert service.close("lane-1") == 20.8
+    assert len(service) == 0
+    with pytest.raises(KeyError):
+        service.scan("lane-1", "A")
+
+def test_concurrent_scans():
+    service = CheckoutService(get_rules(), stripes=4)
+    lanes = range(16)
+    for lane in lanes:
+        service.open(lane)
+
+    def scan_lane(lane):
+        for _ in range(50):
+            for item in "DDEEDDEDDE":
+                service.scan(lane % 2, item)
+            service.scan(lane, "A")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(scan_lane, lanes))
+    assert service.total(2) == 50.0
+    checkout_items = "DDEEDDEDDE" * 50 * 8
+    expected = CheckoutService(get_rules())
+    expected.open(0)
+    for item in checkout_items:
+        expected.scan(0, item)
+    assert service.total(1) == expected.total(0) + 50.0
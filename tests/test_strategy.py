@@ -5,7 +5,8 @@ from src.strategy import (PricingStrategy,
                           NDiscountMPricing,
                           BuyNGetMFreePricing,
                           NForMPricing,
-                          WeightPricing)    
+                          WeightPricing,
+                          TieredPricing)    
 
 def test_pricing_strategy_valid_prices():
     # Test integer price
@@ -103,3 +104,93 @@ def test_weight_pricing_invalid_prices():
 def test_weight_pricing_valid_prices():
     weight_pricing = WeightPricing(10, 2)
     assert weight_pricing.calculate_price(3) == 15.0
+
+def test_tiered_pricing_invalid_prices():
+    with pytest.raises(ValueError):
+        TieredPricing(2, [(5, 1.8)], "stacked")
+    with pytest.raises(ValueError):
+        TieredPricing(2, [(5, 1.8), (5, 1.5)])
+    with pytest.raises(ValueError):
+        TieredPricing(2, [(0, 1.8)])
+    with pytest.raises(TypeError):
+        TieredPricing(2, [(5, "1.8")])
+
+def test_tiered_pricing_valid_prices():
+    all_units = TieredPricing(2, [(20, 1.2), (5, 1.8), (10, 1.5)])
+    assert all_units.thresholds == [5, 10, 20]
+    assert [all_units.calculate_price(quantity) for quantity in (4, 5, 12, 20)] == [8.0, 9.0, 18.0, 24.0]
+    graduated = TieredPricing(2, [(20, 1.2), (5, 1.8), (10, 1.5)], "graduated")
+    assert [graduated.calculate_price(quantity) for quantity in (4, 5, 12, 20)] == [8.0, 9.8, 21.5, 33.2]
+
+def test_calculate_prices():
+    strategies = [RegularPricing(1.1),
+                  DiscountPricing(2, 10),
+                  NDiscountMPricing(4, 3, 10),
+                  BuyNGetMFreePricing(3, 3, 2),
+                  NForMPricing(1, 3, 2),
+                  WeightPricing(10, 3),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)]),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)], "graduated")]
+    quantities = list(range(50)) + [0.5, 1.111, 2.5]
+    for strategy in strategies:
+        expected = [strategy.calculate_price(quantity) for quantity in quantities]
+        assert strategy.calculate_prices(quantities) == expected
+        assert strategy.calculate_prices(range(5)) == expected[:5]
+
+def test_calculate_prices_numpy():
+    numpy = pytest.importorskip("numpy")
+    strategies = [RegularPricing(1.1),
+                  DiscountPricing(2.35, 15),
+                  NDiscountMPricing(0.35, 3, 10),
+                  BuyNGetMFreePricing(3, 3, 2),
+                  NForMPricing(1.37, 3, 3.5),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)]),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)], "graduated")]
+    quantities = numpy.arange(1000)
+    for strategy in strategies:
+        prices = strategy.calculate_prices(quantities)
+        assert isinstance(prices, numpy.ndarray)
+        assert prices.tolist() == [strategy.calculate_price(quantity) for quantity in range(1000)]
+
+def test_calculate_prices_numpy_narrow():
+    numpy = pytest.importorskip("numpy")
+    strategies = [RegularPricing(1.1),
+                  DiscountPricing(2.35, 15),
+                  NDiscountMPricing(0.35, 3, 10),
+                  BuyNGetMFreePricing(3, 3, 2),
+                  NForMPricing(1.37, 3, 3.5),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)]),
+                  TieredPricing(2, [(10, 1.5), (5, 1.8)], "graduated")]
+    for quantities in (numpy.arange(0, 2 ** 31 - 1, 2 ** 24, dtype=numpy.int32),
+                       numpy.arange(256, dtype=numpy.uint8)):
+        for strategy in strategies:
+            prices = strategy.calculate_prices(quantities)
+            assert prices.tolist() == [strategy.calculate_price(int(quantity)) for quantity in quantities]
+
+def test_calculate_price_cents():
+    assert PricingStrategy(10.666).price_cents == 1067
+    assert RegularPricing(1.1).calculate_price_cents(3) == 330
+    assert RegularPricing(2).calculate_price_cents(1.111) == 222
+    assert DiscountPricing(2.35, 10).calculate_price_cents(3) == 636
+    assert NDiscountMPricing(0.35, 3, 10).calculate_price_cents(2) == 70
+    assert NDiscountMPricing(0.35, 3, 10).calculate_price_cents(3) == 96
+    assert BuyNGetMFreePricing(1, 3, 2).calculate_price_cents(11) == 700
+    assert NForMPricing(10, 3, 20).calculate_price_cents(7) == 5000
+    assert WeightPricing(10, 2).calculate_price_cents(3) == 1500
+    assert WeightPricing(1.99, 1).calculate_price_cents(2.5) == 498
+    assert TieredPricing(0.35, [(3, 0.33)]).calculate_price_cents(3) == 99
+    assert TieredPricing(0.35, [(3, 0.33)], "graduated").calculate_price_cents(4) == 136
+
+def test_price_cents_consistency():
+    for price in (1.005, 2.675, 0.125, 10.666, 3):
+        strategy = RegularPricing(price)
+        assert strategy.price * 100 == strategy.price_cents
+        assert round(strategy.calculate_price(7) * 100) == strategy.calculate_price_cents(7)
+    # Deliberately different from the original float arithmetic, which gave 1.0,
+    # 2.005, 10.0 and 1.0499999999999998.
+    assert RegularPricing(1.005).price == 1.01
+    assert NForMPricing(1, 3, 2.005).m_price == 2.01
+    assert NForMPricing(1, 3, 3.333).calculate_price(9) == 9.99
+    assert NDiscountMPricing(0.35, 4, 10).calculate_price(3) == 1.05
+    assert WeightPricing(2.99, 0.1).calculate_price_cents(0.35) == 1047
+    assert WeightPricing(2.99, 0.3).calculate_price_cents(0.1) == 100